@@ -0,0 +1,252 @@
+"""Move generation and search benchmarks
+
+Runs perft on each of the test positions with each move generator, checks the
+counts are still right and records how fast it was. Then the engine searches a
+few of the positions to a fixed depth, so the number of positions it looks at
+and how many it gets through a second can be compared. On machines with more
+than one core the parallel search is timed against a single process too. Every
+run is added to a JSON file so a change can be compared against the runs before
+it.
+
+python benchmark.py [--output benchmarks.json] [--repeat 3] [--label "some change"]
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import typing
+
+from sharedfiles.engine import Engine
+from sharedfiles.parallel import ParallelEngine
+from sharedfiles.perft import POSITIONS, setup_position, timed_perft
+
+GENERATORS = ("objects", "bitboard")
+
+# How deep to search each position, deep enough to take a noticeable amount of
+# time without making the whole suite slow
+DEPTHS = {
+    "start": 4,
+    "kiwipete": 3,
+    "endgame": 4,
+    "promotions": 3,
+    "discovered": 3,
+    "kueen start": 3,
+    "kueen middlegame": 3,
+}
+
+# How deep the engine searches each position
+SEARCH_DEPTHS = {
+    "start": 4,
+    "kiwipete": 3,
+    "kueen start": 3,
+    "kueen middlegame": 3,
+}
+
+# How deep the parallel search and a single process search each position, deep
+# enough that the work outweighs sending it between processes
+PARALLEL_DEPTHS = {
+    "kiwipete": 4,
+    "kueen middlegame": 4,
+}
+
+
+def run_benchmarks(repeat: int = 1) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Runs every position with every generator, keeping the fastest of repeat
+    runs"""
+    results = []
+
+    for generator in GENERATORS:
+        for position in POSITIONS:
+            depth = DEPTHS[position.name]
+
+            times = []
+            for _ in range(repeat):
+                board = setup_position(position, generator)
+                nodes, seconds = timed_perft(board, depth)
+                times.append(seconds)
+            seconds = min(times)
+
+            expected = position.counts[depth - 1]
+            results.append(
+                {
+                    "position": position.name,
+                    "size": position.size,
+                    "generator": generator,
+                    "depth": depth,
+                    "nodes": nodes,
+                    "correct": nodes == expected,
+                    "seconds": round(seconds, 4),
+                    "nodes_per_second": round(nodes / seconds),
+                }
+            )
+
+            print(
+                f"{generator:>8} {position.name:<17} depth {depth} "
+                f"{nodes:>8} nodes {seconds:7.3f}s {nodes / seconds:>9.0f} nodes/s"
+                + ("" if nodes == expected else f" WRONG, expected {expected}")
+            )
+
+    return results
+
+
+def run_search_benchmarks() -> typing.List[typing.Dict[str, typing.Any]]:
+    """Searches some of the positions to a fixed depth with the engine"""
+    results = []
+
+    for position in POSITIONS:
+        depth = SEARCH_DEPTHS.get(position.name)
+        if depth is None:
+            continue
+
+        engine = Engine()
+        result = engine.search(setup_position(position), max_depth=depth)
+        table = engine.transposition_table
+        results.append(
+            {
+                "position": position.name,
+                "size": position.size,
+                "generator": "search",
+                "depth": depth,
+                "nodes": result.nodes,
+                "seconds": round(result.seconds, 4),
+                "nodes_per_second": round(result.nodes_per_second),
+                "hash_hit_rate": round(table.hit_rate, 4),
+                "hash_occupancy": round(table.occupancy, 4),
+            }
+        )
+
+        print(
+            f"  search {position.name:<17} depth {depth} "
+            f"{result.nodes:>8} nodes {result.seconds:7.3f}s "
+            f"{result.nodes_per_second:>9.0f} nodes/s "
+            f"{table.hit_rate:6.1%} hash hits"
+        )
+
+    return results
+
+
+def run_parallel_benchmarks() -> typing.List[typing.Dict[str, typing.Any]]:
+    """Searches some of the positions with the parallel search using every core
+    and with a single process, to see how much faster the parallel search is"""
+    processes = os.cpu_count() or 1
+    if processes < 2:
+        print("parallel: skipped, there is only one core")
+        return []
+
+    results = []
+    engine = ParallelEngine(processes)
+    try:
+        for position in POSITIONS:
+            depth = PARALLEL_DEPTHS.get(position.name)
+            if depth is None:
+                continue
+
+            board = setup_position(position)
+            single = Engine().search(board, max_depth=depth)
+            parallel = engine.search(board, depth)
+            speedup = single.seconds / parallel.seconds
+            results.append(
+                {
+                    "position": position.name,
+                    "size": position.size,
+                    "generator": "parallel",
+                    "depth": depth,
+                    "processes": processes,
+                    "nodes": parallel.nodes,
+                    "seconds": round(parallel.seconds, 4),
+                    "nodes_per_second": round(parallel.nodes_per_second),
+                    "single_seconds": round(single.seconds, 4),
+                    "speedup": round(speedup, 3),
+                    "matches": (single.move, single.score)
+                    == (parallel.move, parallel.score),
+                }
+            )
+
+            print(
+                f"parallel {position.name:<17} depth {depth} "
+                f"{parallel.nodes:>8} nodes {parallel.seconds:7.3f}s "
+                f"vs {single.seconds:.3f}s on 1 process, {speedup:.2f}x "
+                f"with {processes} processes"
+            )
+    finally:
+        engine.close()
+
+    return results
+
+
+def compare(
+    results: typing.List[typing.Dict[str, typing.Any]],
+    previous: typing.List[typing.Dict[str, typing.Any]],
+):
+    """Prints how much faster or slower each result is than the last run"""
+    before = {
+        (result["generator"], result["position"], result["depth"]): result
+        for result in previous
+    }
+
+    print("\nCompared to the last run:")
+    for result in results:
+        old = before.get((result["generator"], result["position"], result["depth"]))
+        if old is None:
+            continue
+
+        change = result["nodes_per_second"] / old["nodes_per_second"] - 1
+        line = f"{result['generator']:>8} {result['position']:<17} {change:+.1%}"
+        # A search looking at a different number of positions means the search
+        # itself has changed, not just its speed
+        if result["nodes"] != old["nodes"]:
+            line += f" ({old['nodes']} -> {result['nodes']} nodes)"
+        print(line)
+
+
+def main(args: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the move generators")
+    parser.add_argument("-o", "--output", default="benchmarks.json")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=1, help="use the fastest of this many"
+    )
+    parser.add_argument("-l", "--label", default="", help="what changed, if anything")
+    options = parser.parse_args(args)
+
+    runs = []
+    if os.path.exists(options.output):
+        with open(options.output) as file:
+            runs = json.load(file)
+
+    results = run_benchmarks(options.repeat)
+    search_results = run_search_benchmarks()
+    parallel_results = run_parallel_benchmarks()
+    if runs:
+        # Older runs might not have search or parallel results
+        previous = (
+            runs[-1]["results"]
+            + runs[-1].get("search", [])
+            + runs[-1].get("parallel", [])
+        )
+        compare(results + search_results + parallel_results, previous)
+
+    runs.append(
+        {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "label": options.label,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+            "search": search_results,
+            "parallel": parallel_results,
+        }
+    )
+    with open(options.output, "w") as file:
+        json.dump(runs, file, indent=4)
+
+    # Fail if any of the counts were wrong, so it can be used as a check
+    if not all(result["correct"] for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
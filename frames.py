@@ -0,0 +1,93 @@
+import collections
+import time
+import typing
+
+import pygame
+
+# How many frames a second the game screen is drawn at, it only has to keep up
+# with the clocks and the computers moves so there is no need for more
+GAME_FPS = 60
+
+# How long the menus wait for something to happen before drawing again anyway,
+# in milliseconds, nothing on them changes by itself so this can be long
+IDLE_TIMEOUT = 500
+
+# How many of the most recent frames the statistics are worked out from
+FRAME_HISTORY = 300
+
+
+class FrameTimer:
+    """Keeps a screen's loop from running faster than it needs to, and records
+    how long each frame took so it can be checked
+
+    Screens that change by themselves (the game, with its clocks) call tick
+    once a frame to run at a steady frame rate. Screens that only change when
+    the user does something call wait_for_events instead, which sleeps until
+    there is an event rather than drawing the same thing over and over."""
+
+    def __init__(self, fps: int = GAME_FPS):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+
+        # (whole frame, time spent working rather than waiting) in milliseconds
+        self.frame_times: typing.Deque[typing.Tuple[float, float]] = collections.deque(
+            maxlen=FRAME_HISTORY
+        )
+        self.frames = 0
+        self.last_frame: typing.Optional[float] = None
+
+    def reset(self):
+        """Forgets the frames so far, for when a screen is opened again"""
+        self.frame_times.clear()
+        self.frames = 0
+        self.last_frame = None
+        self.clock.tick()
+
+    def tick(self) -> float:
+        """Waits until it is time for the next frame, returning how long the
+        last frame took in milliseconds"""
+        frame = self.clock.tick(self.fps)
+        # How long the frame took before tick started waiting
+        self.record(frame, self.clock.get_rawtime())
+        return frame
+
+    def wait_for_events(
+        self, timeout: int = IDLE_TIMEOUT
+    ) -> typing.List[pygame.event.Event]:
+        """Sleeps until something happens or timeout milliseconds have gone by,
+        then returns every event waiting to be handled"""
+        start = time.perf_counter()
+        if self.last_frame is not None:
+            working = (start - self.last_frame) * 1000
+        else:
+            working = 0.0
+
+        event = pygame.event.wait(timeout)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events.extend(pygame.event.get())
+
+        self.last_frame = time.perf_counter()
+        self.record(working + (self.last_frame - start) * 1000, working)
+        return events
+
+    def record(self, frame: float, working: float):
+        self.frames += 1
+        self.frame_times.append((frame, working))
+
+    def get_stats(self) -> str:
+        """The frame rate and frame times over the last few frames, for checking
+        the screen keeps up without using more CPU than it needs to"""
+        if not self.frame_times:
+            return "frames: none drawn"
+
+        frames = [frame for frame, _ in self.frame_times]
+        working = [work for _, work in self.frame_times]
+        average = sum(frames) / len(frames)
+        fps = 1000 / average if average else 0.0
+
+        return (
+            f"frames: {self.frames} drawn, {fps:.1f} fps, "
+            f"frame time {average:.1f}ms average {max(frames):.1f}ms worst, "
+            f"working {sum(working) / len(working):.1f}ms average "
+            f"{max(working):.1f}ms worst (last {len(frames)})"
+        )
@@ -1 +1,4 @@
-import screens  # importing runs the code to start the game  # noqa: F401
+# The engine runs in a process that imports modules fresh, only start the game
+# when this is run directly rather than imported by that process
+if __name__ == "__main__":
+    import screens  # importing runs the code to start the game  # noqa: F401
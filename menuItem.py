@@ -1,7 +1,39 @@
+import functools
 import typing
 
 import pygame
 
+# How many rendered pieces of text to keep, the text on screen is drawn again
+# every frame but things like the clocks keep changing
+TEXT_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(font_name: str, size: int) -> pygame.font.Font:
+    """Loads a font from its file once for each size it is used at"""
+    return pygame.font.Font(font_name, size)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(
+    text: str, font_name: str, size: int, colour: typing.Tuple[int, int, int]
+) -> pygame.Surface:
+    """Renders text once and reuses the surface while it stays in the cache, so
+    the surface shouldn't be drawn on"""
+    return get_font(font_name, size).render(text, True, colour)
+
+
+def get_text_cache_stats() -> str:
+    """How often the font and text caches have been used, for checking they are
+    working"""
+    fonts = get_font.cache_info()
+    text = render_text.cache_info()
+    return (
+        f"fonts: {fonts.hits} hits, {fonts.misses} misses, "
+        f"text: {text.hits} hits, {text.misses} misses "
+        f"({text.currsize}/{text.maxsize} cached)"
+    )
+
 
 def add_text(
     text: str,
@@ -11,8 +43,7 @@ def add_text(
     colour: typing.Tuple[int, int, int] = (255, 255, 255),
     font_name: str = "freesansbold.ttf",
 ) -> pygame.Rect:
-    font = pygame.font.Font(font_name, size)
-    display_text = font.render(text, True, colour)
+    display_text = render_text(text, font_name, size, tuple(colour))
     text_rect = display_text.get_rect()
     text_rect.center = cords
     display.blit(display_text, text_rect)
@@ -34,9 +65,16 @@ class MenuItem:
         self.text = text
         self.colour = colour
         self.display = display
+        self.font_name = font_name
 
         self.rect = add_text(text, center, display, size, colour, font_name)
 
+    def draw(self):
+        """Draws it again, for when the screen has been drawn over"""
+        self.rect = add_text(
+            self.text, self.center, self.display, self.size, self.colour, self.font_name
+        )
+
     def has_been_clicked(self, mousex: int, mousey: int) -> bool:
         return self.rect.collidepoint(mousex, mousey)
 
@@ -56,7 +94,7 @@ class InputBox:
         hide_text: bool = False,
         font_name: str = "freesansbold.ttf",
     ):
-        self.font = pygame.font.Font(font_name, text_size)
+        self.font = get_font(font_name, text_size)
         self.rect = pygame.Rect(x, y, w, h)
         self.colour = self.COLOUR_INACTIVE
         self.text = text
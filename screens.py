@@ -5,8 +5,12 @@ import typing
 import pygame
 
 from database import db
-from menuItem import InputBox, MenuItem, add_text
+from frames import GAME_FPS, FrameTimer
+from menuItem import InputBox, MenuItem, add_text, get_text_cache_stats
+from sharedfiles.analysis import MOVE, PONDER, BackgroundAnalysis
 from sharedfiles.board import Board
+from sharedfiles.engine import get_time_budget
+from sharedfiles.render import BoardRenderer
 from users import User
 
 time_limit = 600  # 10 minutes
@@ -24,10 +28,25 @@ pygame.display.set_caption("Chess")
 
 state = "main menu"
 players: typing.List[User] = []
+against_computer = False  # If the game is against the engine instead of a person
+
+# Runs the engine in another process, started with the first game
+analysis: typing.Optional[BackgroundAnalysis] = None
 
 start_time = time.time()
 elapsed_time = time.time() - start_time
 
+BACKGROUND_COLOUR = (60, 60, 60)
+
+# The game screen is drawn at a steady frame rate for its clocks, the other
+# screens only draw again when something happens
+game_frames = FrameTimer(GAME_FPS)
+menu_frames = FrameTimer()
+
+# The text on the game screen when it was last drawn and where it went, by the
+# position it is centred on
+drawn_text: typing.Dict[typing.Tuple[float, float], typing.Tuple[str, pygame.Rect]] = {}
+
 
 def format_time(seconds: float):
     minutes = int(seconds // 60)
@@ -36,34 +55,62 @@ def format_time(seconds: float):
     return f"{minutes}:{round(secs, 1)}"
 
 
-def draw(display: pygame.surface.Surface):
-    """Draw the board and update the screen"""
-    display.fill((60, 60, 60))
-    board.draw(display)
+def draw(
+    display: pygame.surface.Surface, full: bool = False
+) -> typing.List[pygame.Rect]:
+    """Draw the game screen, only the parts that have changed since the last
+    frame unless full is True
 
-    add_text(
-        f"{white_user.username if board.turn == 'white' else black_user.username}'s turn",  # noqa: E501
-        (718, 50),
-        display,
-        font_name=font,
-    )
-    add_text(f"Move {len(board.moves)}:", (718, 100), display, font_name=font)
-    add_text(
-        "None"
+    Returns the areas of the screen that changed, to pass to
+    pygame.display.update"""
+    turn_user = white_user if board.turn == "white" else black_user
+    texts = {
+        (718, 50): f"{turn_user.username}'s turn",
+        (718, 100): f"Move {len(board.moves)}:",
+        (718, 150): "None"
         if len(board.moves) == 0
         else board.moves[-1][2:]
         if not board.moves[-1].startswith("O-O")
         else board.moves[-1],
-        (718, 150),
-        display,
-        font_name=font,
-    )
-
-    add_text("Blacks Time:", (712.5, 350), display, font_name=font)
-    add_text(format_time(board.black_time), (712.5, 395), display, font_name=font)
-
-    add_text("Whites Time:", (712.5, 450), display, font_name=font)
-    add_text(format_time(board.white_time), (712.5, 495), display, font_name=font)
+        (712.5, 350): "Blacks Time:",
+        (712.5, 395): format_time(board.black_time),
+        (712.5, 450): "Whites Time:",
+        (712.5, 495): format_time(board.white_time),
+    }
+    dirty = []
+
+    if full:
+        display.fill(BACKGROUND_COLOUR)
+        drawn_text.clear()
+        resign_button.draw()
+        hint_button.draw()
+        dirty.append(display.get_rect())
+
+    # Text that has changed is rubbed out first, including any of the board it
+    # went over so those squares get drawn again
+    changed = [
+        cords
+        for cords, text in texts.items()
+        if cords not in drawn_text or drawn_text[cords][0] != text
+    ]
+    for cords in changed:
+        if cords in drawn_text:
+            old_rect = drawn_text[cords][1]
+            display.fill(BACKGROUND_COLOUR, old_rect)
+            renderer.invalidate(old_rect)
+            dirty.append(old_rect)
+
+    board_dirty = renderer.draw(display, full)
+    dirty += board_dirty
+
+    # Text goes on top, so is drawn again if any squares under it were
+    for cords, text in texts.items():
+        if cords in changed or drawn_text[cords][1].collidelist(board_dirty) != -1:
+            rect = add_text(text, cords, display, font_name=font)
+            drawn_text[cords] = (text, rect)
+            dirty.append(rect)
+
+    return dirty
 
 
 def validate_login(username: str, password: str) -> bool:
@@ -98,26 +145,57 @@ results: typing.List = []  # "" for draw or winner, reason
 
 while True:
     if state == "playing":
-        if len(players) < 2:
-            players.append(User(None, None, None, True))
-
-            if len(players) == 1:
+        if against_computer:
+            # The first person logged in (or a guest) plays the engine
+            game_players = [
+                players[0] if players else User(None, None, None, True),
+                User(None, "Computer", None, None, True, computer=True),
+            ]
+        else:
+            if len(players) < 2:
                 players.append(User(None, None, None, True))
 
+                if len(players) == 1:
+                    players.append(User(None, None, None, True))
+
+            game_players = players
+
         if random.randint(0, 1) == 0:  # noqa: S311
-            white_user = players[0]
-            players[0].playing_as = "white"
+            white_user = game_players[0]
+            game_players[0].playing_as = "white"
 
-            black_user = players[1]
-            players[1].playing_as = "black"
+            black_user = game_players[1]
+            game_players[1].playing_as = "black"
         else:
-            white_user = players[1]
-            players[1].playing_as = "white"
+            white_user = game_players[1]
+            game_players[1].playing_as = "white"
 
-            black_user = players[0]
-            players[0].playing_as = "black"
+            black_user = game_players[0]
+            game_players[0].playing_as = "black"
 
         board = Board(WINDOW_SIZE[1], WINDOW_SIZE[1], board_size, time_limit, increment)
+        renderer = BoardRenderer(board)
+
+        # Starting the process is slow, so the same one is used for every game
+        if analysis is None:
+            analysis = BackgroundAnalysis()
+        # Any move makes what it is working on out of date
+        analysis.cancel()
+        board.move_listeners.append(analysis.cancel)
+
+        # The hash of the position a hint was asked for in
+        hint_position: typing.Optional[int] = None
+
+        resign_button = MenuItem(
+            (725, 300), 30, "Resign", (255, 255, 255), screen, font_name=font
+        )
+        hint_button = MenuItem(
+            (725, 250), 30, "Hint", (255, 255, 255), screen, font_name=font
+        )
+
+        # Everything is drawn on the first frame, after that only what changes
+        full_redraw = True
+        game_frames.reset()
 
         running = True
         while running:
@@ -140,10 +218,7 @@ while True:
                     board.black_cumulative_time + board.black_elapsed_time
                 )
 
-            resign_button = MenuItem(
-                (725, 300), 30, "Resign", (255, 255, 255), screen, font_name=font
-            )
-            pygame.display.update()
+            current_user = white_user if board.turn == "white" else black_user
 
             mouse_x, mouse_y = pygame.mouse.get_pos()
             for event in pygame.event.get():
@@ -152,46 +227,110 @@ while True:
                     running = False
                     state = "main menu"
 
+                # The window has been covered up or resized, so what is on the
+                # screen can't be relied on
+                elif event.type == pygame.VIDEOEXPOSE:
+                    full_redraw = True
+
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    # If the mouse is clicked
-                    board.handle_click(mouse_x, mouse_y)
+                    # If the mouse is clicked, the board can't be clicked on while
+                    # the computer is thinking
+                    if not current_user.computer:
+                        board.handle_click(mouse_x, mouse_y)
+
+                    if hint_button.has_been_clicked(mouse_x, mouse_y):
+                        hint_position = board.hash
 
                     if resign_button.has_been_clicked(mouse_x, mouse_y):
+                        # It is the person who isn't the computer resigning, even
+                        # if the computer is thinking
+                        resigning = board.turn
+                        if current_user.computer:
+                            resigning = "white" if board.turn == "black" else "black"
+
                         results = [
-                            "white" if board.turn == "black" else "black",
-                            f"{white_user.username if board.turn == 'white' else black_user.username} resigned",  # noqa: E501
+                            "white" if resigning == "black" else "black",
+                            f"{white_user.username if resigning == 'white' else black_user.username} resigned",  # noqa: E501
                         ]
 
                         running = False
                         state = "results"
 
                         print(
-                            f"{white_user.username.title() if board.turn == 'black' else black_user.username.title()} wins by the other player resigning"  # noqa: E501
+                            f"{white_user.username.title() if resigning == 'black' else black_user.username.title()} wins by the other player resigning"  # noqa: E501
                         )
 
-            if board.is_in_checkmate("black"):  # If black is in checkmate
-                print(f"{white_user.username.title()} wins!")
-                running = False
-                state = "results"
-
-                results = [
-                    "white",
-                    f"{white_user.username} put {black_user.username} in checkmate",
-                ]
+            # Only worked out again after a move, not every frame
+            game_status = board.get_game_status()
+
+            # The engine works in the background so the board and clocks keep
+            # updating: on the computers turn it works out its move, on the
+            # other players turn it ponders their position, which is also used
+            # for hints
+            current_user = white_user if board.turn == "white" else black_user
+            if running and not game_status.over:
+                if current_user.computer:
+                    if not analysis.is_analysing(board, MOVE):
+                        analysis.start(board, MOVE, get_time_budget(board))
+                elif (
+                    against_computer or hint_position == board.hash
+                ) and not analysis.is_analysing(board, PONDER):
+                    analysis.start(board, PONDER)
+
+            update = analysis.poll()
+            if (
+                running
+                and update is not None
+                and update.kind == MOVE
+                and update.finished
+            ):
+                result = update.result
+                print(
+                    f"{current_user.username} searched {result.depth} moves deep, "
+                    f"{result.nodes} positions in {result.seconds:.2f}s "
+                    f"({result.nodes_per_second:.0f} positions/s, "
+                    f"{update.hash_hit_rate:.0%} found in the hash table, "
+                    f"{update.hash_occupancy:.0%} full)"
+                )
 
-            elif board.is_in_checkmate("white"):  # If white is in checkmate
-                print(f"{black_user.username.title()} wins!")
+                # The time spent thinking counts against its clock
+                if board.turn == "white":
+                    board.white_elapsed_time = time.time() - board.time_at_turn
+                else:
+                    board.black_elapsed_time = time.time() - board.time_at_turn
+
+                start, end = result.move
+                board.squares[start].occupying_piece.move(board, board.squares[end])
+                board.update_clocks()
+                game_status = board.get_game_status()
+
+            # Show the best move found so far once a hint has been asked for,
+            # it gets better the longer the engine has been looking
+            renderer.hint = None
+            if (
+                hint_position == board.hash
+                and analysis.is_analysing(board, PONDER)
+                and analysis.latest is not None
+            ):
+                renderer.hint = analysis.latest.result.move
+
+            if game_status.reason == "checkmate":
+                winner, loser = (
+                    (white_user, black_user)
+                    if game_status.winner == "white"
+                    else (black_user, white_user)
+                )
+                print(f"{winner.username.title()} wins!")
                 running = False
                 state = "results"
 
                 results = [
-                    "black",
-                    f"{black_user.username} put {white_user.username} in checkmate",
+                    game_status.winner,
+                    f"{winner.username} put {loser.username} in checkmate",
                 ]
 
-            elif board.is_in_stalemate("black") or board.is_in_stalemate("white"):
+            elif game_status.reason == "stalemate":
                 print("Draw by stalemate")
-                # print("black" if board.is_in_stalemate("black") else "white")
                 running = False
                 state = "results"
 
@@ -224,10 +363,20 @@ while True:
                     f"{black_user.username} ran out of time",
                 ]
 
-            # Draw the board
-            draw(screen)
+            # Draw the board, only sending the parts that changed to the screen
+            dirty = draw(screen, full_redraw)
+            full_redraw = False
+            if dirty:
+                pygame.display.update(dirty)
+
+            # Wait for the next frame rather than drawing as fast as possible
+            game_frames.tick()
 
+        # Stop thinking about a game that is over
+        analysis.cancel()
         print(f"moves: {board.moves}")
+        print(get_text_cache_stats())
+        print(game_frames.get_stats())
     elif state == "main menu":
         running = True
         while running:
@@ -238,7 +387,7 @@ while True:
             )
 
             play_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 100),
+                ((WINDOW_SIZE[0] + 1) / 2, 90),
                 30,
                 "Play game",
                 (255, 255, 255),
@@ -246,8 +395,17 @@ while True:
                 font_name=font,
             )
 
+            computer_button = MenuItem(
+                ((WINDOW_SIZE[0] + 1) / 2, 155),
+                30,
+                "Play computer",
+                (255, 255, 255),
+                screen,
+                font_name=font,
+            )
+
             settings_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 175),
+                ((WINDOW_SIZE[0] + 1) / 2, 220),
                 30,
                 "Settings",
                 (255, 255, 255),
@@ -256,7 +414,7 @@ while True:
             )
 
             register_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 250),
+                ((WINDOW_SIZE[0] + 1) / 2, 285),
                 30,
                 "Register",
                 (255, 255, 255),
@@ -265,7 +423,7 @@ while True:
             )
 
             login_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 325),
+                ((WINDOW_SIZE[0] + 1) / 2, 350),
                 30,
                 "Login",
                 (255, 255, 255) if len(players) != 2 else (150, 150, 150),
@@ -274,7 +432,7 @@ while True:
             )
 
             logout_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 400),
+                ((WINDOW_SIZE[0] + 1) / 2, 415),
                 30,
                 "Logout",
                 (255, 255, 255) if len(players) != 0 else (150, 150, 150),
@@ -283,7 +441,7 @@ while True:
             )
 
             leaderboard_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 475),
+                ((WINDOW_SIZE[0] + 1) / 2, 480),
                 30,
                 "Leaderboard",
                 (255, 255, 255),
@@ -292,7 +450,7 @@ while True:
             )
 
             exit_button = MenuItem(
-                ((WINDOW_SIZE[0] + 1) / 2, 550),
+                ((WINDOW_SIZE[0] + 1) / 2, 545),
                 30,
                 "Exit",
                 (255, 255, 255),
@@ -302,8 +460,10 @@ while True:
 
             pygame.display.update()
 
+            # Nothing changes until something happens, so sleep until it does
+            events = menu_frames.wait_for_events()
             mouse_x, mouse_y = pygame.mouse.get_pos()
-            for event in pygame.event.get():
+            for event in events:
                 # Quit the game if the user presses the close button
                 if event.type == pygame.QUIT:
                     running = False
@@ -312,6 +472,12 @@ while True:
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     # If the mouse is clicked
                     if play_button.has_been_clicked(mouse_x, mouse_y):
+                        against_computer = False
+                        state = "playing"
+                        running = False
+
+                    if computer_button.has_been_clicked(mouse_x, mouse_y):
+                        against_computer = True
                         state = "playing"
                         running = False
 
@@ -510,8 +676,10 @@ while True:
 
             pygame.display.update()
 
+            # Nothing changes until something happens, so sleep until it does
+            events = menu_frames.wait_for_events()
             mouse_x, mouse_y = pygame.mouse.get_pos()
-            for event in pygame.event.get():
+            for event in events:
                 # Quit the game if the user presses the close button
                 if event.type == pygame.QUIT:
                     running = False
@@ -610,8 +778,12 @@ while True:
                 username_field.draw(screen)
                 password_field.draw(screen)
 
+                # Show what was drawn before sleeping until something happens
+                pygame.display.update()
+
+                events = menu_frames.wait_for_events()
                 mouse_x, mouse_y = pygame.mouse.get_pos()
-                for event in pygame.event.get():
+                for event in events:
                     username_field.handle_event(event)
                     password_field.handle_event(event)
 
@@ -635,7 +807,6 @@ while True:
                         else:
                             pass
 
-                pygame.display.update()
         else:
             state = "main menu"
     elif state == "logout":
@@ -674,7 +845,10 @@ while True:
                     font_name=font,
                 )
 
-                for event in pygame.event.get():
+                # Show what was drawn before sleeping until something happens
+                pygame.display.update()
+
+                for event in menu_frames.wait_for_events():
                     # Quit the game if the user presses the close button
                     if event.type == pygame.QUIT:
                         running = False
@@ -695,7 +869,6 @@ while True:
                             state = "main menu"
                             running = False
 
-                pygame.display.update()
     elif state == "register":
         if len(players) < 2:
             running = True
@@ -759,8 +932,12 @@ while True:
                 password_field.draw(screen)
                 confirm_password_field.draw(screen)
 
+                # Show what was drawn before sleeping until something happens
+                pygame.display.update()
+
+                events = menu_frames.wait_for_events()
                 mouse_x, mouse_y = pygame.mouse.get_pos()
-                for event in pygame.event.get():
+                for event in events:
                     username_field.handle_event(event)
                     password_field.handle_event(event)
                     confirm_password_field.handle_event(event)
@@ -847,7 +1024,6 @@ while True:
                         else:
                             pass
 
-                pygame.display.update()
         else:
             state = "main menu"
     elif state == "results":
@@ -955,8 +1131,10 @@ while True:
         running = True
 
         while running:
+            # Nothing changes until something happens, so sleep until it does
+            events = menu_frames.wait_for_events()
             mouse_x, mouse_y = pygame.mouse.get_pos()
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     state = "main menu"
                     running = False
@@ -1044,8 +1222,10 @@ while True:
 
             pygame.display.update()
 
+            # Nothing changes until something happens, so sleep until it does
+            events = menu_frames.wait_for_events()
             mouse_x, mouse_y = pygame.mouse.get_pos()
-            for event in pygame.event.get():
+            for event in events:
                 # Quit the game if the user presses the close button
                 if event.type == pygame.QUIT:
                     running = False
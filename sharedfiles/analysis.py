@@ -0,0 +1,184 @@
+"""Running the engine in the background
+
+Searching takes seconds of pure python, which would stop the game loop drawing
+and reacting to clicks if it ran there, and a thread would still be fighting
+the game loop for the GIL. So the engine runs in a separate process, which is
+sent snapshots of the board (see Board.snapshot) and sends back what it finds.
+
+It is used for:
+- "move", the computer working out its move with the time from its clock
+- "ponder", looking at the human players position until they move, both to
+  have a hint ready for them and to fill the engines transposition table with
+  positions it is likely to see on its own turn
+
+Only one thing is worked on at a time. Starting something new or cancelling
+stops the current search within a few milliseconds, and anything it sends back
+afterwards is ignored.
+
+The process is started with spawn, so it imports this module fresh rather than
+copying the game (and pygame) with it. That means the game has to be started
+from main.py, which only starts the game when it is run directly.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import typing
+
+from sharedfiles.board import Board
+from sharedfiles.engine import Engine, SearchResult
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Snapshot
+
+MOVE = "move"
+PONDER = "ponder"
+
+
+class AnalysisRequest(typing.NamedTuple):
+    request_id: int
+    kind: str  # MOVE or PONDER
+    snapshot: Snapshot
+    time_limit: typing.Optional[float]  # None to search until cancelled
+
+
+class AnalysisUpdate(typing.NamedTuple):
+    request_id: int
+    kind: str
+    result: SearchResult
+    finished: bool  # False while it is still searching deeper
+    hash_hit_rate: float
+    hash_occupancy: float
+
+
+def run_worker(
+    requests: multiprocessing.Queue,
+    updates: multiprocessing.Queue,
+    current: typing.Any,
+    hash_megabytes: float,
+):
+    """The loop run in the background process, searching each request that
+    hasn't been cancelled and sending back the best move after each depth"""
+    # The engine and its transposition table are kept between requests, so
+    # pondering helps with the search that comes after it
+    engine = Engine(hash_megabytes)
+    boards: typing.Dict[int, Board] = {}
+
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+
+        # Anything started since this was sent replaces it
+        request_id = request.request_id
+        if request_id != current.value:
+            continue
+
+        size = request.snapshot.size
+        if size not in boards:
+            boards[size] = Board(800, 800, size)
+        board = boards[size]
+        board.restore(request.snapshot)
+
+        # The request is bound as defaults so these only ever refer to the
+        # request they were made for
+        def send(
+            result: SearchResult,
+            finished: bool,
+            request_id: int = request_id,
+            kind: str = request.kind,
+        ):
+            table = engine.transposition_table
+            updates.put(
+                AnalysisUpdate(
+                    request_id,
+                    kind,
+                    result,
+                    finished,
+                    table.hit_rate,
+                    table.occupancy,
+                )
+            )
+
+        engine.should_stop = lambda request_id=request_id: current.value != request_id
+        result = engine.search(
+            board,
+            request.time_limit,
+            progress=lambda result: send(result, False),
+        )
+        send(result, True)
+
+
+class BackgroundAnalysis:
+    def __init__(self, hash_megabytes: float = 16):
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.updates = context.Queue()
+
+        # The id of the request the worker should be working on, anything else
+        # has been cancelled. Only this process changes it
+        self.current = context.RawValue("q", 0)
+
+        self.process = context.Process(
+            target=run_worker,
+            args=(self.requests, self.updates, self.current, hash_megabytes),
+            daemon=True,
+        )
+        self.process.start()
+
+        # What is being worked on, and the hash of the position it is for
+        self.kind: typing.Optional[str] = None
+        self.position_hash: typing.Optional[int] = None
+
+        # The newest update for it
+        self.latest: typing.Optional[AnalysisUpdate] = None
+
+    def start(self, board: Board, kind: str, time_limit: typing.Optional[float] = None):
+        """Stops whatever is being worked on and starts analysing the board"""
+        self.current.value += 1
+        self.kind = kind
+        self.position_hash = board.hash
+        self.latest = None
+
+        self.requests.put(
+            AnalysisRequest(self.current.value, kind, board.snapshot(), time_limit)
+        )
+
+    def is_analysing(self, board: Board, kind: str) -> bool:
+        """Checks if this kind of analysis has been started for the position the
+        board is in"""
+        return self.kind == kind and self.position_hash == board.hash
+
+    def cancel(self, *_):
+        """Stops whatever is being worked on, it can be used as a move listener
+        so moves on the board cancel it straight away"""
+        self.current.value += 1
+        self.kind = None
+        self.position_hash = None
+        self.latest = None
+
+    def poll(self) -> typing.Optional[AnalysisUpdate]:
+        """Returns the newest update for what is being worked on, or None if
+        there hasn't been a new one, without waiting"""
+        newest = None
+        while True:
+            try:
+                update = self.updates.get_nowait()
+            except queue.Empty:
+                break
+
+            if update.request_id == self.current.value:
+                newest = update
+
+        if newest is not None:
+            self.latest = newest
+        return newest
+
+    def close(self):
+        """Stops the background process"""
+        self.cancel()
+        self.requests.put(None)
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
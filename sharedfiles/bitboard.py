@@ -0,0 +1,504 @@
+"""Bitboard move generation
+
+A position is stored as one integer per piece type and colour, with bit
+y * size + x set for every square a piece of that type is on. Python integers
+have no fixed size, so the same code works for 8x8 (64 bit) and 10x10 (100 bit)
+boards.
+
+The bitboards are read from the board once, then Board.make_move and
+Board.unmake_move move the pieces on them as they move on the board.
+
+Moves come out of get_move_bits as a bitboard of targets for each square with a
+piece on it, and generate_moves turns those into (start index, end index) pairs
+without going near the Piece and Square objects. Only get_valid_moves and
+get_all_valid_moves, which the game uses, turn them into squares.
+"""
+
+from __future__ import annotations
+
+import typing
+
+from sharedfiles.piece import (
+    BISHOP,
+    COLOURS,
+    DIAGONAL_SLIDERS,
+    KING,
+    KNIGHT,
+    KNIGHT_JUMPERS,
+    KUEEN,
+    NOTATIONS,
+    PAWN,
+    QUEEN,
+    ROOK,
+    STRAIGHT_SLIDERS,
+    WHITE,
+)
+from sharedfiles.pieces.king import CASTLING_RIGHTS
+from sharedfiles.tables import DIAGONAL, INCREASING, STRAIGHT, get_tables
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Board, Undo
+    from sharedfiles.piece import Piece
+    from sharedfiles.square import Square
+
+
+def iterate_bits(bitboard: int) -> typing.Iterator[int]:
+    """Yields the index of each set bit from lowest to highest"""
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+# How many bits are set in a bitboard, int.bit_count is only in Python 3.10 onwards
+count_bits: typing.Callable[[int], int] = getattr(
+    int, "bit_count", lambda bitboard: bin(bitboard).count("1")
+)
+
+# The directions each piece slides in, by piece code
+SLIDING_DIRECTIONS = tuple(
+    tuple(
+        direction
+        for direction in range(8)
+        if code in STRAIGHT_SLIDERS
+        and direction in STRAIGHT
+        or code in DIAGONAL_SLIDERS
+        and direction in DIAGONAL
+    )
+    for code in range(len(NOTATIONS))
+)
+# If the index goes up along each direction, by direction
+IS_INCREASING = tuple(direction in INCREASING for direction in range(8))
+
+
+def get_nearest(bitboard: int, direction: int) -> int:
+    """The index of the set bit nearest the start of a ray in a direction"""
+    if direction in INCREASING:
+        return (bitboard & -bitboard).bit_length() - 1
+    return bitboard.bit_length() - 1
+
+
+class BitboardCheckInfo(typing.NamedTuple):
+    """The same as CheckInfo in board.py, as bitboards"""
+
+    checkers: int  # The pieces giving check
+    # The squares a piece other than the king can move to, every square if not
+    # in check and none in double check
+    block: int
+    # The squares each pinned piece (by index) can move to
+    pins: typing.Dict[int, int]
+
+
+class BitboardGenerator:
+    """Generates the same moves as Piece.get_valid_moves using bitboards
+
+    It can be swapped in behind any Board with
+    Board(..., move_generator="bitboard"), the board keeps it up to date. perft
+    uses generate_moves and count_moves directly
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.tables = get_tables(board.size)
+        size = board.size
+
+        # pieces[colour_code][code] has a bit set for each of those pieces
+        self.pieces: typing.List[typing.List[int]] = []
+        # Every square each colour has a piece on
+        self.occupied: typing.List[int] = []
+
+        # Every square on the board, and the rows a pawn lands on after its
+        # first step forward from its starting row, by colour code
+        self.full = (1 << size * size) - 1
+        self.first_step_rows = (
+            self.tables.row_bits[size - 3],
+            self.tables.row_bits[2],
+        )
+
+        # The checks and pins on each colours king and the squares its pawns
+        # can push to, worked out the first time they are needed in each position
+        self.check_info: typing.Dict[int, BitboardCheckInfo] = {}
+        self.pushes: typing.Dict[int, typing.Tuple[int, int]] = {}
+        # The result of get_move_bits for each colour
+        self.move_bits: typing.Dict[int, typing.Dict[int, int]] = {}
+        self.position_hash: typing.Optional[int] = None
+
+        self.load()
+
+    def load(self):
+        """Reads the position from the board, for when it has been set up
+        rather than changed by make_move"""
+        self.pieces = [[0] * len(NOTATIONS) for _ in COLOURS]
+        for index, value in enumerate(self.board.codes):
+            if value:
+                self.pieces[value >> 3 & 1][(value & 7) - 1] |= 1 << index
+
+        self.occupied = [sum(pieces) for pieces in self.pieces]
+        self.position_hash = None
+
+    def update(self, undo: Undo):
+        """Moves the pieces on the bitboards the same way as a move made on the
+        board, or takes it back, as flipping the same bits again undoes it"""
+        piece = undo.piece
+        colour = piece.colour_code
+        pieces = self.pieces[colour]
+
+        start = 1 << undo.start.index
+        end = 1 << undo.end.index
+        pieces[piece.code] ^= start
+        pieces[(undo.promoted or piece).code] ^= end
+        moved = start | end
+
+        if undo.rook_start is not None:
+            rook = 1 << undo.rook_start.index | 1 << undo.rook_end.index
+            pieces[ROOK] ^= rook
+            moved |= rook
+        self.occupied[colour] ^= moved
+
+        if undo.captured is not None:
+            captured = 1 << undo.captured_square.index
+            self.pieces[1 - colour][undo.captured.code] ^= captured
+            self.occupied[1 - colour] ^= captured
+
+    def check_position(self):
+        """Forgets what was worked out for the last position if the board has
+        moved on since"""
+        if self.position_hash != self.board.hash:
+            self.check_info = {}
+            self.pushes = {}
+            self.move_bits = {}
+            self.position_hash = self.board.hash
+
+    def get_pushes(self, colour: int) -> typing.Tuple[int, int]:
+        """Every square a colours pawns can move one and two squares forward to,
+        for all of them at once by shifting the whole board a row"""
+        if colour in self.pushes:
+            return self.pushes[colour]
+
+        size = self.board.size
+        pawns = self.pieces[colour][PAWN]
+        empty = ~(self.occupied[0] | self.occupied[1]) & self.full
+
+        # White pawns go up the board (to lower indexes), black pawns go down
+        if colour == WHITE:
+            single = pawns >> size & empty
+            double = (single & self.first_step_rows[colour]) >> size & empty
+        else:
+            single = pawns << size & empty
+            double = (single & self.first_step_rows[colour]) << size & empty
+
+        self.pushes[colour] = (single, double)
+        return single, double
+
+    def get_check_info(self, colour: int) -> BitboardCheckInfo:
+        """Finds the pieces giving check to a colours king and the pieces pinned
+        to it, by looking outwards from the king once"""
+        if colour in self.check_info:
+            return self.check_info[colour]
+
+        tables = self.tables
+        ray_bits = tables.ray_bits
+        pieces = self.pieces[1 - colour]
+        own = self.occupied[colour]
+        occupied = own | self.occupied[1 - colour]
+        king_index = self.pieces[colour][KING].bit_length() - 1
+
+        checkers = tables.knight_bits[king_index] & (pieces[KNIGHT] | pieces[KUEEN]) | (
+            tables.pawn_bits[colour][king_index] & pieces[PAWN]
+        )
+        block = checkers
+        pins = {}
+
+        straight = pieces[ROOK] | pieces[QUEEN] | pieces[KUEEN]
+        diagonal = pieces[BISHOP] | pieces[QUEEN] | pieces[KUEEN]
+        for direction, ray in enumerate(ray_bits[king_index]):
+            sliders = straight if direction in STRAIGHT else diagonal
+            if not ray & sliders:
+                continue
+
+            # The squares from the king up to and including the nearest piece
+            blockers = ray & occupied
+            nearest = get_nearest(blockers, direction)
+            line = ray ^ ray_bits[nearest][direction]
+
+            if sliders >> nearest & 1:
+                checkers |= 1 << nearest
+                block |= line
+            elif own >> nearest & 1:
+                # One of our pieces is pinned if the next piece along attacks
+                behind = blockers & ray_bits[nearest][direction]
+                if behind:
+                    pinner = get_nearest(behind, direction)
+                    if sliders >> pinner & 1:
+                        pins[nearest] = ray ^ ray_bits[pinner][direction]
+
+        if not checkers:
+            block = self.full
+        elif checkers & (checkers - 1):
+            # In double check only the king can move
+            block = 0
+
+        info = BitboardCheckInfo(checkers, block, pins)
+        self.check_info[colour] = info
+        return info
+
+    def ray_attacks(
+        self, index: int, directions: typing.Tuple[int, ...], occupied: int
+    ) -> int:
+        """The squares a sliding piece on a square can reach, stopping at (and
+        including) the first occupied square in each direction"""
+        ray_bits = self.tables.ray_bits
+        rays = ray_bits[index]
+        attacks = 0
+
+        for direction in directions:
+            ray = rays[direction]
+            blockers = ray & occupied
+            if blockers:
+                # Find the nearest blocker and remove everything behind it
+                if IS_INCREASING[direction]:
+                    nearest = (blockers & -blockers).bit_length() - 1
+                else:
+                    nearest = blockers.bit_length() - 1
+                ray ^= ray_bits[nearest][direction]
+            attacks |= ray
+
+        return attacks
+
+    def is_attacked(
+        self, index: int, colour_code: int, occupied: int, captured: int = 0
+    ) -> bool:
+        """Checks if any of colours pieces attack the square, ignoring any piece on
+        the captured bitboard"""
+        pieces = self.pieces[colour_code]
+        tables = self.tables
+        keep = ~captured
+
+        if tables.knight_bits[index] & (pieces[KNIGHT] | pieces[KUEEN]) & keep:
+            return True
+
+        if tables.king_bits[index] & pieces[KING]:
+            return True
+
+        # A pawn attacks this square if it is where a pawn of the other colour
+        # standing here would attack
+        if tables.pawn_bits[1 - colour_code][index] & pieces[PAWN] & keep:
+            return True
+
+        straight = (pieces[ROOK] | pieces[QUEEN] | pieces[KUEEN]) & keep
+        if straight and self.ray_attacks(index, STRAIGHT, occupied) & straight:
+            return True
+
+        diagonal = (pieces[BISHOP] | pieces[QUEEN] | pieces[KUEEN]) & keep
+        return bool(diagonal and self.ray_attacks(index, DIAGONAL, occupied) & diagonal)
+
+    def get_attacks(self, colour: int, occupied: int) -> int:
+        """Every square a colours pieces attack, with pieces on the occupied
+        squares blocking the sliding pieces"""
+        tables = self.tables
+        pieces = self.pieces[colour]
+        size = self.board.size
+
+        # Pawns attack diagonally forward, worked out for all of them at once by
+        # shifting them a row and one column either way, leaving out the pawns
+        # on the edge that would wrap round onto the other side of the board
+        pawns = pieces[PAWN]
+        left = pawns & ~tables.column_bits[0]
+        right = pawns & ~tables.column_bits[size - 1]
+        if colour == WHITE:
+            attacks = left >> size + 1 | right >> size - 1
+        else:
+            attacks = (left << size - 1 | right << size + 1) & self.full
+
+        attacks |= tables.king_bits[pieces[KING].bit_length() - 1]
+
+        knight_bits = tables.knight_bits
+        ray_attacks = self.ray_attacks
+        for code in (KNIGHT, BISHOP, ROOK, QUEEN, KUEEN):
+            directions = SLIDING_DIRECTIONS[code]
+            jumps = code in KNIGHT_JUMPERS
+            bits = pieces[code]
+            while bits:
+                lowest = bits & -bits
+                index = lowest.bit_length() - 1
+                if directions:
+                    attacks |= ray_attacks(index, directions, occupied)
+                if jumps:
+                    attacks |= knight_bits[index]
+                bits ^= lowest
+
+        return attacks
+
+    def castling_moves(
+        self, colour: int, index: int, attacks: typing.Optional[int] = None
+    ) -> int:
+        """The squares the king on index can castle to, with the same rules as
+        King.can_castle. attacks are the squares the other colour attacks, if
+        they have already been worked out"""
+        board = self.board
+        kingside, queenside = CASTLING_RIGHTS[COLOURS[colour]]
+        rights = board.castling_rights & (kingside | queenside)
+
+        # Can't castle out of check
+        if not rights or self.get_check_info(colour).checkers:
+            return 0
+
+        size = board.size
+        row = index - index % size
+        occupied = self.occupied[0] | self.occupied[1]
+        moves = 0
+
+        for right, path, passes, target in (
+            # The squares between the king and the rook, and the squares the king
+            # goes over and lands on
+            (queenside, (1 << index) - (2 << row), 3 << index - 2, index - 2),
+            (kingside, (1 << row + size - 1) - (2 << index), 3 << index + 1, index + 2),
+        ):
+            if not rights & right or occupied & path:
+                continue
+
+            # or through or into it
+            if attacks is None:
+                attacks = self.get_attacks(1 - colour, occupied)
+            if not attacks & passes:
+                moves |= 1 << target
+
+        return moves
+
+    def is_en_passant_legal(self, colour: int, index: int) -> bool:
+        """Checks the pawn on index taking by en passant doesn't leave its king in
+        check
+
+        The pawn taken isn't on the square moved to, so taking it can stop a check
+        or uncover one along the row, which is checked by looking for attacks on
+        the king after the move"""
+        size = self.board.size
+        en_passant = self.board.en_passant
+        target = 1 << en_passant
+        captured = 1 << index - index % size + en_passant % size
+        occupied = (self.occupied[0] | self.occupied[1]) & ~(1 << index | captured)
+
+        return not self.is_attacked(
+            self.pieces[colour][KING].bit_length() - 1,
+            1 - colour,
+            occupied | target,
+            captured=captured,
+        )
+
+    def get_move_bits(self, colour: int) -> typing.Dict[int, int]:
+        """Every legal move for a colours pieces, as a bitboard of the squares
+        each one can move to by the index of the square it is on
+
+        Everything else (moves, counts and squares) is made from this, and it is
+        only worked out once per position"""
+        self.check_position()
+        if colour in self.move_bits:
+            return self.move_bits[colour]
+
+        tables = self.tables
+        pieces = self.pieces[colour]
+        own = self.occupied[colour]
+        enemy = self.occupied[1 - colour]
+        occupied = own | enemy
+        info = self.get_check_info(colour)
+        # Apart from the king, pieces have to stop any check
+        allowed = ~own & info.block
+        pins = info.pins
+        move_bits = {}
+
+        single, double = self.get_pushes(colour)
+        step_bits = tables.pawn_step_bits[colour]
+        double_step_bits = tables.pawn_double_step_bits[colour]
+        pawn_bits = tables.pawn_bits[colour]
+        bits = pieces[PAWN]
+        while bits:
+            lowest = bits & -bits
+            index = lowest.bit_length() - 1
+            # Which of the pushes worked out for every pawn are this ones, kept
+            # apart as another pawns single push can be this ones double push
+            moves = (
+                single & step_bits[index]
+                | double & double_step_bits[index]
+                | pawn_bits[index] & enemy
+            ) & allowed
+            if index in pins:
+                moves &= pins[index]
+            move_bits[index] = moves
+            bits ^= lowest
+
+        # Only the colour whose turn it is can take by en passant, which is
+        # checked separately as it can get out of check and out of a pin
+        en_passant = self.board.en_passant
+        if en_passant is not None and COLOURS[colour] == self.board.turn:
+            takers = tables.pawn_bits[1 - colour][en_passant] & pieces[PAWN]
+            for index in iterate_bits(takers):
+                if self.is_en_passant_legal(colour, index):
+                    move_bits[index] |= 1 << en_passant
+
+        knight_bits = tables.knight_bits
+        ray_attacks = self.ray_attacks
+        for code in (KNIGHT, BISHOP, ROOK, QUEEN, KUEEN):
+            directions = SLIDING_DIRECTIONS[code]
+            jumps = code in KNIGHT_JUMPERS
+            bits = pieces[code]
+            while bits:
+                lowest = bits & -bits
+                index = lowest.bit_length() - 1
+                moves = ray_attacks(index, directions, occupied) if directions else 0
+                if jumps:
+                    moves |= knight_bits[index]
+                moves &= allowed
+                if index in pins:
+                    moves &= pins[index]
+                move_bits[index] = moves
+                bits ^= lowest
+
+        # The king can't move onto an attacked square, which is checked with it
+        # off its square so it doesn't hide attacks along the line it is moving
+        # away on
+        index = pieces[KING].bit_length() - 1
+        attacks = None
+        moves = tables.king_bits[index] & ~own
+        if moves:
+            attacks = self.get_attacks(1 - colour, occupied ^ 1 << index)
+            moves &= ~attacks
+        move_bits[index] = moves | self.castling_moves(colour, index, attacks)
+
+        self.move_bits[colour] = move_bits
+        return move_bits
+
+    def generate_moves(self, colour: int) -> typing.List[typing.Tuple[int, int]]:
+        """Every legal move for a colour as (start index, end index)"""
+        output = []
+        for start, bits in self.get_move_bits(colour).items():
+            # The same as iterate_bits, without the cost of a generator
+            while bits:
+                lowest = bits & -bits
+                output.append((start, lowest.bit_length() - 1))
+                bits ^= lowest
+        return output
+
+    def count_moves(self, colour: int) -> int:
+        """How many legal moves a colour has, without listing them"""
+        return sum(map(count_bits, self.get_move_bits(colour).values()))
+
+    def get_valid_moves(self, piece: Piece) -> typing.List[Square]:
+        """Returns the squares a piece can legally move to"""
+        squares = self.board.squares
+        index = piece.y * self.board.size + piece.x
+        bits = self.get_move_bits(piece.colour_code).get(index, 0)
+        return [squares[target] for target in iterate_bits(bits)]
+
+    def get_all_valid_moves(
+        self, colour: str
+    ) -> typing.List[typing.Tuple[Piece, typing.List[Square]]]:
+        """Returns every piece of a colour with the squares it can move to, for
+        the game which works with the pieces and squares"""
+        squares = self.board.squares
+        return [
+            (
+                squares[index].occupying_piece,
+                [squares[target] for target in iterate_bits(bits)],
+            )
+            for index, bits in self.get_move_bits(COLOURS.index(colour)).items()
+        ]
@@ -1,34 +1,193 @@
 from __future__ import annotations
 
+import copy
 import time
 import typing
 
+from sharedfiles.bitboard import BitboardGenerator
+from sharedfiles.evaluation import (
+    PHASE_WEIGHTS,
+    PIECE_VALUES,
+    EvaluationTables,
+    count_totals,
+    get_evaluation_tables,
+)
+from sharedfiles.piece import (
+    BLACK,
+    COLOURS,
+    DIAGONAL_SLIDERS,
+    KING,
+    KNIGHT_JUMPERS,
+    PAWN,
+    QUEEN,
+    ROOK,
+    STRAIGHT_SLIDERS,
+    WHITE,
+)
 from sharedfiles.pieces.bishop import Bishop
-from sharedfiles.pieces.king import King
+from sharedfiles.pieces.king import (
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    CASTLING_RIGHTS,
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    King,
+)
 from sharedfiles.pieces.knight import Knight
 from sharedfiles.pieces.kueen import Kueen
 from sharedfiles.pieces.pawn import Pawn
 from sharedfiles.pieces.queen import Queen
 from sharedfiles.pieces.rook import Rook
 from sharedfiles.square import Square
+from sharedfiles.tables import DIAGONAL, MAX_SIZE, STRAIGHT, Tables, get_tables
+from sharedfiles.zobrist import ZobristKeys, get_zobrist_keys
 
 if typing.TYPE_CHECKING:
     from sharedfiles.piece import Piece
 
 
+class Undo(typing.NamedTuple):
+    """Everything Board.unmake_move needs to put a move back"""
+
+    piece: Piece  # The piece that moved
+    start: Square
+    end: Square
+    captured: typing.Optional[Piece]
+    captured_square: typing.Optional[Square]  # Not the end square for en passant
+    promoted: typing.Optional[Piece]  # What a pawn was promoted to
+    rook_start: typing.Optional[Square]  # Where the rook was before castling
+    rook_end: typing.Optional[Square]
+    had_moved: bool
+    castling_rights: int
+    en_passant: typing.Optional[int]
+    halfmove_clock: int
+    hash: int
+    # The evaluation totals before the move
+    middlegame_score: int
+    endgame_score: int
+    phase: int
+    material: typing.Tuple[int, int]
+
+
+class CheckInfo(typing.NamedTuple):
+    """The pieces giving check to a king and the pieces pinned to it"""
+
+    king: Square
+    checkers: typing.List[Square]
+    # The squares a piece other than the king can move to to stop the check
+    # (by taking the checking piece or getting in the way), None if not in check
+    block: typing.Optional[typing.Set[int]]
+    # The square of each pinned piece and the squares it can move to without
+    # leaving the line between the king and the piece pinning it
+    pins: typing.Dict[int, typing.Set[int]]
+
+
+class GameStatus(typing.NamedTuple):
+    """Whether the game has ended by checkmate or stalemate"""
+
+    over: bool
+    winner: typing.Optional[str]  # None if it is a draw or not over yet
+    reason: typing.Optional[str]  # "checkmate" or "stalemate"
+
+
+class Snapshot(typing.NamedTuple):
+    """The state of a game, small enough to keep lots of and to pickle
+
+    Made by Board.snapshot and put back with Board.restore"""
+
+    size: int
+    # One byte per square, 0 if it is empty, otherwise the pieces code + 1 in the
+    # lowest 3 bits, then a bit for its colour and a bit for if it has moved
+    pieces: bytes
+    turn: str
+    castling_rights: int
+    castling_squares: typing.Tuple[typing.Tuple[int, int], ...]
+    en_passant: typing.Optional[int]
+    halfmove_clock: int
+    hash: int
+    moves: typing.Tuple[str, ...]
+    move_count: int
+    # white_time, black_time, white_cumulative_time, black_cumulative_time,
+    # time_at_turn
+    clocks: typing.Tuple[float, float, float, float, float]
+    # The evaluation totals, so they don't have to be added up again
+    middlegame_score: int
+    endgame_score: int
+    phase: int
+    material: typing.Tuple[int, int]
+    # The hashes of the positions since the last capture or pawn move, so
+    # repetitions of them can still be spotted (see Board.get_recent_hashes)
+    history: typing.Tuple[int, ...]
+
+
+def get_piece_byte(piece: typing.Optional[Piece]) -> int:
+    """The byte for a square in Board.codes and Snapshot.pieces"""
+    if piece is None:
+        return 0
+    return piece.code + 1 | piece.colour_code << 3 | piece.has_moved << 4
+
+
+# The class for each piece code
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, Kueen, King)
+# The letter for each piece code in FEN and Board.config, W is the kueen
+PIECE_LETTERS = "PNBRQWK"
+# The castling rights in the order FEN lists them
+CASTLING_LETTERS = (
+    ("K", WHITE_KINGSIDE),
+    ("Q", WHITE_QUEENSIDE),
+    ("k", BLACK_KINGSIDE),
+    ("q", BLACK_QUEENSIDE),
+)
+
+
 # Game state checker
 class Board:
-    def __init__(self, width, height, size=8, time_limit=600, increment=0):
+    def __init__(
+        self,
+        width,
+        height,
+        size=8,
+        time_limit=600,
+        increment=0,
+        move_generator="objects",
+        fen: typing.Optional[str] = None,
+    ):
         # Sets up the width and height of the board as well as the individual squares
         self.width = width
         self.height = height
         self.tile_width = width // size
         self.tile_height = height // size
 
-        if size >= 8:
-            self.size = size
-        else:
+        if size < 8:
             raise ValueError("The board must be a minimum of 8x8")
+        if size > MAX_SIZE:
+            raise ValueError(f"The board can be a maximum of {MAX_SIZE}x{MAX_SIZE}")
+        self.size = size
+
+        # Where pieces can move from each square, shared by every board this size
+        self.tables: Tables = get_tables(size)
+        self.zobrist: ZobristKeys = get_zobrist_keys(size)
+        self.evaluation_tables: EvaluationTables = get_evaluation_tables(size)
+
+        # The Zobrist hash of the current position, kept up to date by make_move
+        self.hash = 0
+
+        # Totals for scoring the position (see evaluation.py), also kept up to
+        # date by make_move so the engine doesn't have to add them up each time
+        self.middlegame_score = 0
+        self.endgame_score = 0
+        self.phase = 0
+        self.material = (0, 0)  # The value of each colours pieces by colour code
+
+        # The last result of get_game_status and the hash of the position it was
+        # for, so it is only worked out again once the position changes
+        self.game_status: typing.Optional[GameStatus] = None
+        self.game_status_hash: typing.Optional[int] = None
+
+        # Every move the colour to move can make, by the index of the square it
+        # starts on, worked out once per position by get_legal_moves
+        self.legal_moves: typing.Dict[int, typing.List[Square]] = {}
+        self.legal_moves_hash: typing.Optional[int] = None
 
         # What piece is selected (if any)
         self.selected_piece: Piece = None
@@ -48,6 +207,30 @@ class Board:
         self.moves = []
         self.move_count = 0
 
+        # The square (index into self.squares) a pawn can be taken on by en passant
+        # if the last move was a pawn moving 2 squares, otherwise None
+        self.en_passant: typing.Optional[int] = None
+
+        # Which sides each colour can still castle on (set up in setup_board)
+        self.castling_rights = 0
+        # The rooks starting squares (indexes) and the castling right they hold
+        self.castling_squares: typing.Dict[int, int] = {}
+
+        # Moves since the last capture or pawn move, for the 50 move rule
+        self.halfmove_clock = 0
+
+        # Everything needed to take back each move made with make_move
+        self.undo_stack: typing.List[Undo] = []
+        # The hashes of positions from before the first move on the undo stack,
+        # oldest first, for boards copied or restored part way through a game
+        self.history: typing.List[int] = []
+
+        # Functions called with (prev_square, square, captured) after every move
+        # Used by the renderer to play sounds without the rules needing pygame
+        self.move_listeners: typing.List[
+            typing.Callable[[Square, Square, bool], None]
+        ] = []
+
         # What the board currently looks like
         # By default configured how a chess game starts
 
@@ -94,23 +277,190 @@ class Board:
                 # ["wR", "", "", "", "", "wK", "", "", "", "wR"],
             ]
 
+        # The kings of each colour, so they can be found without searching the board
+        self.kings: typing.Dict[str, King] = {}
+
         # Generates the squares and sets up the board
+        # self.squares is a flat list going across each row, so the square at (x, y)
+        # is self.squares[y * self.size + x]
         self.squares = self.generate_squares()
-        self.setup_board()
+
+        # A byte for each square describing its piece (see get_piece_byte), kept
+        # up to date by make_move so saving the position is a single copy
+        self.codes = bytearray(size * size)
+
+        # Which move generator to use, either the pieces themselves ("objects")
+        # or the bitboard generator ("bitboard"), made once the board is set up
+        if move_generator not in ("objects", "bitboard"):
+            raise ValueError(f"Unknown move generator {move_generator!r}")
+        self.bitboards: typing.Optional[BitboardGenerator] = None
+
+        # Start from the FEN if there is one, otherwise from self.config
+        if fen is None:
+            self.setup_board()
+        else:
+            self.load_fen(fen)
+
+        if move_generator == "bitboard":
+            self.bitboards = BitboardGenerator(self)
+
+    def snapshot(self) -> Snapshot:
+        """Saves the state of the game (not the undo stack) so it can be put back
+        later with restore, or sent to another process"""
+        return Snapshot(
+            self.size,
+            bytes(self.codes),
+            self.turn,
+            self.castling_rights,
+            tuple(self.castling_squares.items()),
+            self.en_passant,
+            self.halfmove_clock,
+            self.hash,
+            tuple(self.moves),
+            self.move_count,
+            (
+                self.white_time,
+                self.black_time,
+                self.white_cumulative_time,
+                self.black_cumulative_time,
+                self.time_at_turn,
+            ),
+            self.middlegame_score,
+            self.endgame_score,
+            self.phase,
+            self.material,
+            tuple(self.get_recent_hashes()),
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """Puts the board back to the state saved in a snapshot
+
+        Moves made before the snapshot was taken can't be taken back afterwards"""
+        if snapshot.size != self.size:
+            raise ValueError(
+                f"Can't restore a {snapshot.size}x{snapshot.size} snapshot "
+                f"onto a {self.size}x{self.size} board"
+            )
+
+        # Only the squares that are different need changing, usually there are
+        # only a few when going back to an earlier position in the same game
+        codes = self.codes
+        pieces = snapshot.pieces
+        if codes != pieces:
+            squares = self.squares
+            for index, old, value in zip(range(len(pieces)), codes, pieces):
+                if old == value:
+                    continue
+
+                square = squares[index]
+                if not value:
+                    square.occupying_piece = None
+                elif (old ^ value) & 15:
+                    # A different piece (or colour)
+                    piece = PIECE_CLASSES[(value & 7) - 1](
+                        square.pos, COLOURS[value >> 3 & 1]
+                    )
+                    piece.has_moved = bool(value & 16)
+                    square.occupying_piece = piece
+                    if piece.code == KING:
+                        self.kings[piece.colour] = piece
+                else:
+                    # The same piece, it has just moved or not since
+                    square.occupying_piece.has_moved = bool(value & 16)
+
+            codes[:] = pieces
+            if self.bitboards is not None:
+                self.bitboards.load()
+
+        self.turn = snapshot.turn
+        self.castling_rights = snapshot.castling_rights
+        self.castling_squares = dict(snapshot.castling_squares)
+        self.en_passant = snapshot.en_passant
+        self.halfmove_clock = snapshot.halfmove_clock
+        self.hash = snapshot.hash
+        self.moves = list(snapshot.moves)
+        self.move_count = snapshot.move_count
+        (
+            self.white_time,
+            self.black_time,
+            self.white_cumulative_time,
+            self.black_cumulative_time,
+            self.time_at_turn,
+        ) = snapshot.clocks
+        self.middlegame_score = snapshot.middlegame_score
+        self.endgame_score = snapshot.endgame_score
+        self.phase = snapshot.phase
+        self.material = snapshot.material
+
+        self.selected_piece = None
+        self.undo_stack = []
+        self.history = list(snapshot.history)
+        # The cached moves and status refer to the old pieces
+        self.legal_moves_hash = None
+        self.game_status = None
+
+    def clone(self, board: typing.Optional[Board] = None) -> Board:
+        """Makes a separate copy of the board that can be changed without changing
+        this one, for example to try out moves while a game is being played
+
+        A new board needs new squares and pieces, which is far slower than
+        snapshot and restore. So an old copy of a board this size that isn't
+        needed any more can be passed in to be reused, then only the squares that
+        are different are changed, which is as quick as restore
+
+        Nothing listening to this boards moves is copied over"""
+        if board is None:
+            board = copy.copy(self)
+            board.squares = board.generate_squares()
+            # Empty, so restore puts in new pieces for every square with one
+            board.codes = bytearray(len(self.codes))
+            board.kings = {}
+            board.legal_moves = {}
+            board.bitboards = None
+        else:
+            # Everything restore doesn't change
+            board.width, board.height = self.width, self.height
+            board.tile_width, board.tile_height = self.tile_width, self.tile_height
+            board.increment = self.increment
+            board.white_elapsed_time = self.white_elapsed_time
+            board.black_elapsed_time = self.black_elapsed_time
+            board.config = self.config
+
+        board.move_listeners = []
+        board.restore(self.snapshot())
+
+        if self.bitboards is None:
+            board.bitboards = None
+        elif board.bitboards is None:
+            board.bitboards = BitboardGenerator(board)
+
+        return board
+
+    def get_recent_hashes(self) -> typing.List[int]:
+        """The hashes of the positions before this one, oldest first, back to the
+        last capture or pawn move as positions before that can't happen again"""
+        clock = self.halfmove_clock
+        if not clock:
+            return []
+
+        hashes = [undo.hash for undo in self.undo_stack[-clock:]]
+        if len(hashes) < clock and self.history:
+            hashes = self.history[len(hashes) - clock :] + hashes
+        return hashes
 
     def generate_squares(self) -> typing.List[Square]:
         """Generates and returns the list of squares making up the board"""
         output = []
         for y in range(self.size):
             for x in range(self.size):
-                output.append(Square(x, y, self.tile_width, self.tile_height, self))
+                output.append(Square(x, y, self))
         return output
 
     def get_square_from_pos(self, pos) -> typing.Optional[Square]:
         """Returns the square for the given position"""
-        for square in self.squares:
-            if (square.x, square.y) == (pos[0], pos[1]):
-                return square
+        x, y = pos
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return self.squares[y * self.size + x]
 
         return None
 
@@ -120,26 +470,277 @@ class Board:
 
     def setup_board(self):
         """Puts the correct pieces in the squares from the self.config"""
-
-        notations = {
-            "R": Rook,
-            "N": Knight,
-            "B": Bishop,
-            "Q": Queen,
-            "K": King,
-            "P": Pawn,
-            "W": Kueen,
-        }
-
         for y, row in enumerate(self.config):
             for x, piece in enumerate(row):
-                if piece != "":
-                    square = self.get_square_from_pos((x, y))
+                if piece != "" and piece[1] in PIECE_LETTERS:
+                    square = self.squares[y * self.size + x]
+                    square.occupying_piece = PIECE_CLASSES[
+                        PIECE_LETTERS.index(piece[1])
+                    ]((x, y), "white" if piece[0] == "w" else "black")
+
+                    if piece[1] == "K":
+                        self.kings[
+                            square.occupying_piece.colour
+                        ] = square.occupying_piece
+
+        self.setup_castling()
+        self.reset_codes()
+        self.hash = self.compute_hash()
+        self.reset_evaluation()
+        if self.bitboards is not None:
+            self.bitboards.load()
+
+    def setup_castling(self):
+        """Gives each king the right to castle with a rook at either end of its row"""
+        self.castling_rights = 0
+        self.castling_squares = {}
+
+        for colour, (kingside, queenside) in CASTLING_RIGHTS.items():
+            king = self.kings.get(colour)
+            if king is None or king.has_moved:
+                continue
+
+            for x, right in ((self.size - 1, kingside), (0, queenside)):
+                rook = self.get_piece_from_pos((x, king.y))
+                if type(rook) == Rook and rook.colour == colour and not rook.has_moved:
+                    self.castling_rights |= right
+                    self.castling_squares[king.y * self.size + x] = right
+
+    def load_fen(self, fen: str):
+        """Sets the board up from a FEN string, like
+        rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1
+
+        The board has to be the right size already. Numbers of empty squares can
+        be more than one digit on bigger boards, and W is a kueen. The halfmove
+        clock and move number can be left off the end"""
+        fields = fen.split()
+        if not 4 <= len(fields) <= 6:
+            raise ValueError(f"A FEN needs 4 to 6 fields, not {len(fields)}: {fen!r}")
+        placement, turn, castling, en_passant = fields[:4]
+        halfmove_clock = fields[4] if len(fields) > 4 else "0"
+        move_number = fields[5] if len(fields) > 5 else "1"
+
+        # Read the pieces first so nothing is changed if the FEN is wrong
+        pieces = []
+        rows = placement.split("/")
+        if len(rows) != self.size:
+            raise ValueError(
+                f"The board is {self.size}x{self.size} so the FEN needs {self.size} "
+                f"rows, not {len(rows)}"
+            )
+
+        for y, row in enumerate(rows):
+            x = 0
+            empty = ""
+            for letter in row + "/":
+                if letter.isdigit():
+                    empty += letter
+                    continue
+
+                # The number of empty squares before this piece, if any
+                if empty:
+                    x += int(empty)
+                    empty = ""
+                if letter == "/":
+                    break
+
+                if letter.upper() not in PIECE_LETTERS:
+                    raise ValueError(f"Unknown piece {letter!r} in FEN")
+                if x >= self.size:
+                    raise ValueError(f"Row {row!r} in FEN is too long")
+                # Pawns promote on the last row and can't go back to the first
+                if letter in "Pp" and y in (0, self.size - 1):
+                    raise ValueError(f"A pawn can't be on the end row {row!r}")
+                pieces.append(
+                    (
+                        y * self.size + x,
+                        PIECE_CLASSES[PIECE_LETTERS.index(letter.upper())],
+                        "white" if letter.isupper() else "black",
+                    )
+                )
+                x += 1
+
+            if x != self.size:
+                raise ValueError(f"Row {row!r} in FEN isn't {self.size} squares long")
+
+        if turn not in ("w", "b"):
+            raise ValueError(f"The side to move in a FEN must be w or b, not {turn!r}")
+
+        if en_passant == "-":
+            en_passant_index = None
+        elif en_passant in self.tables.coords:
+            en_passant_index = self.tables.coords.index(en_passant)
+            # It is the square behind a pawn the other colour just moved 2 squares
+            if en_passant_index // self.size != (2 if turn == "w" else self.size - 3):
+                raise ValueError(f"{en_passant} can't be an en passant square")
+        else:
+            raise ValueError(f"Unknown en passant square {en_passant!r} in FEN")
+
+        if not (halfmove_clock.isdigit() and move_number.isdigit()):
+            raise ValueError("The halfmove clock and move number must be numbers")
+        if int(move_number) < 1:
+            raise ValueError("The move number in a FEN starts at 1")
+
+        if castling != "-" and (
+            any(letter not in "KQkq" for letter in castling)
+            or len(set(castling)) != len(castling)
+        ):
+            raise ValueError(f"Unknown castling rights {castling!r} in FEN")
+
+        # The piece class and colour on each square that has one
+        placed = {index: (piece_class, colour) for index, piece_class, colour in pieces}
+
+        kings = {}
+        for index, piece_class, colour in pieces:
+            if piece_class is King:
+                if colour in kings:
+                    raise ValueError(f"A FEN can't have more than one {colour} king")
+                kings[colour] = index
+        if set(kings) != {"white", "black"}:
+            raise ValueError("A FEN needs a king of each colour")
+
+        # The king and rook of each castling right must still be in place
+        castling_rights = 0
+        castling_squares = {}
+        for letter, right in CASTLING_LETTERS:
+            if castling == "-" or letter not in castling:
+                continue
+
+            colour = "white" if letter.isupper() else "black"
+            king_y = kings[colour] // self.size
+            home_y = self.size - 1 if colour == "white" else 0
+            rook_index = king_y * self.size + (self.size - 1 if letter in "Kk" else 0)
+            if king_y != home_y or placed.get(rook_index) != (Rook, colour):
+                raise ValueError(f"{colour.title()} can't have castling right {letter}")
+
+            castling_rights |= right
+            castling_squares[rook_index] = right
+
+        # The pawn that moved 2 squares must be in front of the en passant square
+        if en_passant_index is not None:
+            colour = "black" if turn == "w" else "white"
+            pawn_index = en_passant_index + (self.size if turn == "w" else -self.size)
+            if placed.get(pawn_index) != (Pawn, colour) or en_passant_index in placed:
+                raise ValueError(f"There is no {colour} pawn to take on {en_passant}")
+
+        # Everything has been checked, so now the board can be changed
+        for square in self.squares:
+            square.occupying_piece = None
+        self.kings = {}
+
+        for index, piece_class, colour in pieces:
+            square = self.squares[index]
+            piece = piece_class(square.pos, colour)
+            # There is no way to tell from a FEN if a piece has moved, but
+            # nothing other than castling (which has its own rights) depends on it
+            piece.has_moved = True
+            square.occupying_piece = piece
+            if piece_class is King:
+                self.kings[colour] = piece
+
+        # Apart from the kings and rooks that can still castle
+        for rook_index in castling_squares:
+            rook = self.squares[rook_index].occupying_piece
+            rook.has_moved = self.kings[rook.colour].has_moved = False
+
+        self.castling_rights = castling_rights
+        self.castling_squares = castling_squares
+
+        self.turn = "white" if turn == "w" else "black"
+        self.en_passant = en_passant_index
+        self.halfmove_clock = int(halfmove_clock)
+        # move_count is the number of moves made by both colours
+        self.move_count = (int(move_number) - 1) * 2 + (self.turn == "black")
+        self.moves = []
 
-                    if piece[1] in notations:
-                        square.occupying_piece = notations[piece[1]](
-                            (x, y), "white" if piece[0] == "w" else "black", self
-                        )
+        self.selected_piece = None
+        self.undo_stack = []
+        self.history = []
+        self.legal_moves_hash = None
+        self.game_status = None
+        self.reset_codes()
+        self.hash = self.compute_hash()
+        self.reset_evaluation()
+        if self.bitboards is not None:
+            self.bitboards.load()
+
+    def get_fen(self) -> str:
+        """Returns the position as a FEN string, which load_fen can read back"""
+        rows = []
+        for y in range(self.size):
+            row = ""
+            empty = 0
+            for square in self.squares[y * self.size : (y + 1) * self.size]:
+                piece = square.occupying_piece
+                if piece is None:
+                    empty += 1
+                    continue
+
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = PIECE_LETTERS[piece.code]
+                row += letter if piece.colour == "white" else letter.lower()
+
+            rows.append(row + (str(empty) if empty else ""))
+
+        castling = "".join(
+            letter for letter, right in CASTLING_LETTERS if self.castling_rights & right
+        )
+        en_passant = (
+            "-" if self.en_passant is None else self.tables.coords[self.en_passant]
+        )
+
+        return " ".join(
+            (
+                "/".join(rows),
+                "w" if self.turn == "white" else "b",
+                castling or "-",
+                en_passant,
+                str(self.halfmove_clock),
+                str(self.move_count // 2 + 1),
+            )
+        )
+
+    def reset_codes(self):
+        """Fills in self.codes from the squares, make_move keeps it up to date
+        after the board is set up"""
+        self.codes[:] = bytes(
+            [get_piece_byte(square.occupying_piece) for square in self.squares]
+        )
+
+    def compute_hash(self) -> int:
+        """Works out the Zobrist hash of the position from scratch
+
+        make_move keeps self.hash up to date, this is only needed when the board
+        is set up or changed some other way"""
+        keys = self.zobrist
+        output = 0
+
+        for square in self.squares:
+            piece = square.occupying_piece
+            if piece is not None:
+                output ^= keys.pieces[piece.colour_code][piece.code][square.index]
+
+        if self.turn == "black":
+            output ^= keys.black_to_move
+        output ^= keys.castling[self.castling_rights]
+        if self.en_passant is not None:
+            output ^= keys.en_passant[self.en_passant % self.size]
+
+        return output
+
+    def reset_evaluation(self):
+        """Adds up the evaluation totals from scratch
+
+        Like compute_hash this is only needed when the board is set up, make_move
+        keeps them up to date after that"""
+        (
+            self.middlegame_score,
+            self.endgame_score,
+            self.phase,
+            self.material,
+        ) = count_totals(self)
 
     def handle_click(self, mouse_x, mouse_y):
         """Code to handle when the user clicks on the board"""
@@ -159,23 +760,9 @@ class Board:
                     self.selected_piece = clicked_square.occupying_piece
 
             # If you have clicked on a square the selected piece can move to
-            # change who's turn it is
+            # it becomes the other colours turn
             elif self.selected_piece.move(self, clicked_square):
-                self.turn = "white" if self.turn == "black" else "black"
-
-                if self.turn == "white":
-                    self.white_cumulative_time += (
-                        self.white_elapsed_time - self.increment
-                    )
-                else:
-                    self.black_cumulative_time += (
-                        self.black_elapsed_time - self.increment
-                    )
-
-                self.time_at_turn = time.time()
-
-                for pawn in self.get_pawns(self.turn):
-                    pawn.en_passant_possible = False
+                self.update_clocks()
 
             # If you already have a piece selected but click on another of your pieces
             # select the new piece
@@ -185,116 +772,412 @@ class Board:
             ):
                 self.selected_piece = clicked_square.occupying_piece
 
+    def update_clocks(self):
+        """Starts the clock for the colour whose turn it now is, after a move
+
+        The time they took on their last turn (less the increment) is added to
+        their total before their elapsed time starts counting from 0 again"""
+        if self.turn == "white":
+            self.white_cumulative_time += self.white_elapsed_time - self.increment
+        else:
+            self.black_cumulative_time += self.black_elapsed_time - self.increment
+
+        self.time_at_turn = time.time()
+
+    def make_move(self, start: Square, end: Square) -> Undo:
+        """Moves the piece on start to end, including any capture, en passant,
+        castling or promotion, and makes it the other colours turn
+
+        Unlike Piece.move there are no side effects (sounds, clocks, notation), and
+        the move can be taken back with unmake_move"""
+        piece = start.occupying_piece
+        captured = end.occupying_piece
+        captured_square = end if captured is not None else None
+        promoted = None
+        rook_start = rook_end = None
+
+        undo_en_passant = self.en_passant
+        self.en_passant = None
+
+        keys = self.zobrist
+        pieces = keys.pieces[piece.colour_code]
+        undo_hash = self.hash
+        # The side to move always changes and the old castling rights and en
+        # passant square come out, the new ones go back in at the end
+        new_hash = self.hash ^ keys.black_to_move ^ keys.castling[self.castling_rights]
+        if undo_en_passant is not None:
+            new_hash ^= keys.en_passant[undo_en_passant % self.size]
+
+        if piece.code == PAWN:
+            # Promotes immediately to a queen
+            # as its easier than letting the user choose
+            if end.y in (0, self.size - 1):
+                promoted = Queen(end.pos, piece.colour)
+                promoted.has_moved = True
+
+            if end.index == undo_en_passant and end.x != start.x:
+                # Taken via en passant, the pawn being taken is beside the start
+                captured_square = self.squares[start.y * self.size + end.x]
+                captured = captured_square.occupying_piece
+                captured_square.occupying_piece = None
+                self.codes[captured_square.index] = 0
+
+            elif abs(end.y - start.y) == 2:
+                # The square it jumped over can be taken on by en passant
+                self.en_passant = (start.index + end.index) // 2
+
+        elif piece.code == KING and abs(end.x - start.x) == 2:
+            # Castling, the rook jumps over to the other side of the king
+            if end.x < start.x:
+                rook_start = self.squares[start.y * self.size]
+                rook_end = self.squares[end.index + 1]
+            else:
+                rook_start = self.squares[start.y * self.size + self.size - 1]
+                rook_end = self.squares[end.index - 1]
+
+            rook = rook_start.occupying_piece
+            rook_start.occupying_piece = None
+            rook_end.occupying_piece = rook
+            rook.pos, rook.x, rook.y = rook_end.pos, rook_end.x, rook_end.y
+            rook.has_moved = True
+            self.codes[rook_start.index] = 0
+            self.codes[rook_end.index] = get_piece_byte(rook)
+            new_hash ^= pieces[ROOK][rook_start.index] ^ pieces[ROOK][rook_end.index]
+
+        undo = Undo(
+            piece,
+            start,
+            end,
+            captured,
+            captured_square,
+            promoted,
+            rook_start,
+            rook_end,
+            piece.has_moved,
+            self.castling_rights,
+            undo_en_passant,
+            self.halfmove_clock,
+            undo_hash,
+            self.middlegame_score,
+            self.endgame_score,
+            self.phase,
+            self.material,
+        )
+
+        start.occupying_piece = None
+        end.occupying_piece = promoted or piece
+        piece.pos, piece.x, piece.y = end.pos, end.x, end.y
+        piece.has_moved = True
+        self.codes[start.index] = 0
+        self.codes[end.index] = get_piece_byte(promoted or piece)
+
+        # Moving the king or a rook (or taking a rook) loses the right to castle
+        if self.castling_rights:
+            if piece.code == KING:
+                kingside, queenside = CASTLING_RIGHTS[piece.colour]
+                self.castling_rights &= ~(kingside | queenside)
+            self.castling_rights &= ~(
+                self.castling_squares.get(start.index, 0)
+                | self.castling_squares.get(end.index, 0)
+            )
+
+        if piece.code == PAWN or captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        self.move_count += 1
+
+        new_hash ^= pieces[piece.code][start.index]
+        new_hash ^= pieces[QUEEN if promoted else piece.code][end.index]
+        if captured is not None:
+            new_hash ^= keys.pieces[captured.colour_code][captured.code][
+                captured_square.index
+            ]
+        new_hash ^= keys.castling[self.castling_rights]
+        if self.en_passant is not None:
+            new_hash ^= keys.en_passant[self.en_passant % self.size]
+        self.hash = new_hash
+
+        # The evaluation totals change in the same way as the hash, taking out
+        # the pieces that moved or were taken and adding them where they went
+        tables = self.evaluation_tables
+        colour_code = piece.colour_code
+        middlegame = tables.middlegame[colour_code]
+        endgame = tables.endgame[colour_code]
+        end_code = QUEEN if promoted else piece.code
+        middlegame_score = (
+            self.middlegame_score
+            - middlegame[piece.code][start.index]
+            + middlegame[end_code][end.index]
+        )
+        endgame_score = (
+            self.endgame_score
+            - endgame[piece.code][start.index]
+            + endgame[end_code][end.index]
+        )
+
+        if rook_start is not None:
+            middlegame_score += (
+                middlegame[ROOK][rook_end.index] - middlegame[ROOK][rook_start.index]
+            )
+            endgame_score += (
+                endgame[ROOK][rook_end.index] - endgame[ROOK][rook_start.index]
+            )
+
+        # Material and the phase only change with captures and promotions
+        if captured is not None:
+            index = captured_square.index
+            middlegame_score -= tables.middlegame[captured.colour_code][captured.code][
+                index
+            ]
+            endgame_score -= tables.endgame[captured.colour_code][captured.code][index]
+            self.phase -= PHASE_WEIGHTS[captured.code]
+            material = list(self.material)
+            material[captured.colour_code] -= PIECE_VALUES[captured.code]
+            self.material = tuple(material)
+
+        if promoted:
+            self.phase += PHASE_WEIGHTS[QUEEN]
+            material = list(self.material)
+            material[colour_code] += PIECE_VALUES[QUEEN] - PIECE_VALUES[PAWN]
+            self.material = tuple(material)
+
+        self.middlegame_score = middlegame_score
+        self.endgame_score = endgame_score
+
+        if self.bitboards is not None:
+            self.bitboards.update(undo)
+
+        self.turn = "white" if self.turn == "black" else "black"
+        self.undo_stack.append(undo)
+        return undo
+
+    def unmake_move(self) -> Undo:
+        """Takes back the last move made with make_move, restoring the board to
+        exactly how it was before"""
+        undo = self.undo_stack.pop()
+        piece = undo.piece
+
+        codes = self.codes
+
+        undo.end.occupying_piece = None
+        undo.start.occupying_piece = piece
+        piece.pos, piece.x, piece.y = undo.start.pos, undo.start.x, undo.start.y
+        piece.has_moved = undo.had_moved
+        codes[undo.end.index] = 0
+        codes[undo.start.index] = get_piece_byte(piece)
+
+        if undo.captured is not None:
+            undo.captured_square.occupying_piece = undo.captured
+            codes[undo.captured_square.index] = get_piece_byte(undo.captured)
+
+        if undo.rook_start is not None:
+            rook = undo.rook_end.occupying_piece
+            undo.rook_end.occupying_piece = None
+            undo.rook_start.occupying_piece = rook
+            rook.pos, rook.x, rook.y = (
+                undo.rook_start.pos,
+                undo.rook_start.x,
+                undo.rook_start.y,
+            )
+            # Castling is only allowed if the rook hasn't moved before
+            rook.has_moved = False
+            codes[undo.rook_end.index] = 0
+            codes[undo.rook_start.index] = get_piece_byte(rook)
+
+        self.castling_rights = undo.castling_rights
+        self.en_passant = undo.en_passant
+        self.halfmove_clock = undo.halfmove_clock
+        self.move_count -= 1
+        self.hash = undo.hash
+        self.middlegame_score = undo.middlegame_score
+        self.endgame_score = undo.endgame_score
+        self.phase = undo.phase
+        self.material = undo.material
+        self.turn = "white" if self.turn == "black" else "black"
+
+        if self.bitboards is not None:
+            self.bitboards.update(undo)
+
+        return undo
+
+    def is_square_attacked(self, square: Square, colour: str) -> bool:
+        """Checks if any of a colours pieces could capture on a square
+
+        Rather than generating every move for that colour, it looks outwards from
+        the square for a piece that would be able to reach it"""
+        squares = self.squares
+        tables = self.tables
+        index = square.index
+        colour_code = BLACK if colour == "black" else WHITE
+
+        # Sliding pieces along each line
+        rays = tables.rays[index]
+        for directions, sliders in (
+            (STRAIGHT, STRAIGHT_SLIDERS),
+            (DIAGONAL, DIAGONAL_SLIDERS),
+        ):
+            for direction in directions:
+                for i in rays[direction]:
+                    piece = squares[i].occupying_piece
+                    if piece is not None:
+                        if piece.colour_code == colour_code and piece.code in sliders:
+                            return True
+                        break
+
+        for table, jumpers in (
+            (tables.knight, KNIGHT_JUMPERS),
+            (tables.king, (KING,)),
+            # Pawns capture diagonally forward, so look diagonally backwards for
+            # them (the way a pawn of the other colour would capture)
+            (tables.pawn_captures[1 - colour_code], (PAWN,)),
+        ):
+            for i in table[index]:
+                piece = squares[i].occupying_piece
+                if (
+                    piece is not None
+                    and piece.colour_code == colour_code
+                    and piece.code in jumpers
+                ):
+                    return True
+
+        return False
+
     def is_in_check(
         self,
         colour: str,
         board_change: typing.List[
             typing.Tuple[int, int], typing.Tuple[int, int]
         ] = None,
-        tmp: bool = False,
     ):  # board_change = [(x1, y1), (x2, y2)]
-        """Checks is a certain colour is in check or not"""
-
-        # Makes some variables that will be used while checking
-        output = False
-        king_pos = None
-        changing_piece = None
-        old_square = None
-        new_square = None
-        new_square_old_piece = None
-
+        """Checks is a certain colour is in check or not, if board_change is given
+        it checks if they would be in check after making that move"""
         if board_change is not None:
-            print("board_change is not None") if tmp else ""
-            for square in self.squares:
-                if square.pos == board_change[0]:
-                    changing_piece = square.occupying_piece
-                    old_square = square
-                    old_square.occupying_piece = None
-
-                if square.pos == board_change[1]:
-                    new_square = square
-                    new_square_old_piece = new_square.occupying_piece
-                    new_square.occupying_piece = changing_piece
-
-        pieces = [
-            i.occupying_piece for i in self.squares if i.occupying_piece is not None
-        ]
-
-        if changing_piece is not None and changing_piece.notation == "K":
-            king_pos = new_square.pos
-
-        if king_pos is None:
-            for piece in pieces:
-                if piece.notation == "K" and piece.colour == colour:
-                    king_pos = piece.pos
+            self.make_move(
+                self.get_square_from_pos(board_change[0]),
+                self.get_square_from_pos(board_change[1]),
+            )
 
-        for piece in pieces:
-            if piece.colour != colour:
-                # If a piece can attack the square the king is on
-                print(
-                    f"{piece.notation}: {[square.pos for square in piece.attacking_squares(self)]}"  # noqa: E501
-                ) if tmp else ""
-                for square in piece.attacking_squares(self):
-                    if square.pos == king_pos:
-                        output = True
+        output = self.is_square_attacked(
+            self.get_square_from_pos(self.kings[colour].pos),
+            "white" if colour == "black" else "black",
+        )
 
         if board_change is not None:
-            old_square.occupying_piece = changing_piece
-            new_square.occupying_piece = new_square_old_piece
+            self.unmake_move()
 
         return output
 
-    def is_in_checkmate(self, colour):
-        """Checks if a colours king is in checkmate"""
-
-        # Find the colours king
-        for piece in [i.occupying_piece for i in self.squares]:
-            if piece is not None and piece.notation == "K" and piece.colour == colour:
-                king = piece
-
-        # If the king can't move anywhere and is in check, it is in checkmate
-        if king.get_valid_moves(self) == [] and self.is_in_check(colour):
-            for piece in [i.occupying_piece for i in self.squares]:
+    def get_check_info(self, colour: str) -> CheckInfo:
+        """Finds the pieces giving check to a colours king and the pieces pinned to
+        it, by looking outwards from the king once"""
+        squares = self.squares
+        tables = self.tables
+        king = self.kings[colour]
+        colour_code = king.colour_code
+        index = king.y * self.size + king.x
+
+        checkers = []
+        block = set()
+        pins = {}
+
+        for direction, ray in enumerate(self.tables.rays[index]):
+            sliders = STRAIGHT_SLIDERS if direction in STRAIGHT else DIAGONAL_SLIDERS
+            pinned = None
+
+            for distance, i in enumerate(ray):
+                piece = squares[i].occupying_piece
+                if piece is None:
+                    continue
+
+                if piece.colour_code == colour_code:
+                    # The first of our pieces along the line might be pinned,
+                    # if there are two neither of them are
+                    if pinned is not None:
+                        break
+                    pinned = i
+                    continue
+
+                if piece.code in sliders:
+                    line = ray[: distance + 1]
+                    if pinned is None:
+                        checkers.append(squares[i])
+                        block.update(line)
+                    else:
+                        pins[pinned] = set(line)
+                break
+
+        for table, jumpers in (
+            (tables.knight, KNIGHT_JUMPERS),
+            (tables.pawn_captures[colour_code], (PAWN,)),
+        ):
+            for i in table[index]:
+                piece = squares[i].occupying_piece
                 if (
                     piece is not None
-                    and piece.colour == colour
-                    and len(piece.get_valid_moves(self)) != 0
+                    and piece.colour_code != colour_code
+                    and piece.code in jumpers
                 ):
-                    # It can move, can't be checkmate
-                    return False
+                    checkers.append(squares[i])
+                    block.add(i)
 
-            return True
+        # In double check only the king can move
+        if len(checkers) > 1:
+            block = set()
 
-        return False
+        return CheckInfo(squares[index], checkers, block if checkers else None, pins)
 
-    def is_in_stalemate(self, colour):
-        """Detects if a colour is in stalemate
-        It does this by looping over every piece of that colour
-        and returns False is it can move
-        """
-        for piece in [square.occupying_piece for square in self.squares]:
+    def has_valid_moves(self, colour: str) -> bool:
+        """Checks if any of a colours pieces can move, stopping at the first one that
+        can rather than generating every move"""
+        check_info = self.get_check_info(colour)
+
+        # The king is the most likely piece to be able to move when in check
+        if self.kings[colour].get_valid_moves(self, check_info):
+            return True
+
+        colour_code = COLOURS.index(colour)
+        for square in self.squares:
+            piece = square.occupying_piece
             if (
                 piece is not None
-                and piece.colour == colour
-                and piece.get_valid_moves(self) != []
+                and piece.colour_code == colour_code
+                and piece.code != KING
+                and piece.get_valid_moves(self, check_info)
             ):
-                return False
+                return True
 
-        return True
+        return False
 
-    def draw(self, display):
-        """Draws the board to the screen"""
+    def is_in_checkmate(self, colour):
+        """Checks if a colours king is in checkmate"""
+        return self.is_in_check(colour) and not self.has_valid_moves(colour)
 
-        # Highlight the selected pieces square and any squares it can move to
-        if self.selected_piece is not None:
-            self.get_square_from_pos(self.selected_piece.pos).highlight = True
-            for square in self.selected_piece.get_valid_moves(self):
-                if square:
-                    square.highlight = True
+    def is_in_stalemate(self, colour):
+        """Detects if a colour is in stalemate, they aren't in check but none of
+        their pieces can move"""
+        return not self.is_in_check(colour) and not self.has_valid_moves(colour)
+
+    def get_game_status(self) -> GameStatus:
+        """Checks if the colour whose turn it is has been checkmated or stalemated
+
+        Only the colour to move can have no moves, and the answer can't change
+        until the position does, so it is remembered until then"""
+        if self.game_status is not None and self.game_status_hash == self.hash:
+            return self.game_status
+
+        if any(self.get_legal_moves().values()):
+            status = GameStatus(False, None, None)
+        elif self.is_in_check(self.turn):
+            status = GameStatus(
+                True, "white" if self.turn == "black" else "black", "checkmate"
+            )
+        else:
+            status = GameStatus(True, None, "stalemate")
 
-        # Draw all the squares on the screen
-        for square in self.squares:
-            square.draw(display)
+        self.game_status = status
+        self.game_status_hash = self.hash
+        return status
 
     def get_pawns(
         self, colour: typing.Optional[str] = None, y: typing.Optional[int] = None
@@ -306,14 +1189,17 @@ class Board:
         """
         pawns = []
 
-        for square in self.squares:
+        # Only the one row needs checking if a y value is given
+        squares = (
+            self.squares
+            if y is None
+            else self.squares[y * self.size : (y + 1) * self.size]
+        )
+
+        for square in squares:
             piece = square.occupying_piece
 
-            if (
-                type(piece) == Pawn
-                and (colour == piece.colour or colour is None)
-                and (y == square.y or y is None)
-            ):
+            if type(piece) == Pawn and (colour == piece.colour or colour is None):
                 pawns.append(piece)
 
         return pawns
@@ -334,9 +1220,16 @@ class Board:
         if [notation, pos, colour] == [None, None, None]:
             raise ValueError("No criteria for searching for pieces found")
 
+        # If a position is given only that one square needs checking
+        if pos is not None:
+            square = self.get_square_from_pos(pos)
+            squares = [square] if square is not None else []
+        else:
+            squares = self.squares
+
         pieces = [
             square.occupying_piece
-            for square in self.squares
+            for square in squares
             if square.occupying_piece is not None
         ]
 
@@ -355,20 +1248,47 @@ class Board:
 
         return criteria_met_pieces
 
-    def get_all_move_notations(self) -> typing.List[str]:
-        pieces = [
-            square.occupying_piece
-            for square in self.squares
-            if square.occupying_piece is not None
-            and square.occupying_piece.colour == self.turn
+    def get_all_valid_moves(
+        self, colour: str
+    ) -> typing.List[typing.Tuple[Piece, typing.List[Square]]]:
+        """Returns every piece of a colour along with the squares it can move to"""
+        if self.bitboards is not None:
+            return self.bitboards.get_all_valid_moves(colour)
+
+        # Checks and pins only need finding once for all the pieces
+        check_info = self.get_check_info(colour)
+        colour_code = COLOURS.index(colour)
+
+        return [
+            (piece, piece.get_valid_moves(self, check_info))
+            for piece in [square.occupying_piece for square in self.squares]
+            if piece is not None and piece.colour_code == colour_code
         ]
 
+    def get_legal_moves(self) -> typing.Dict[int, typing.List[Square]]:
+        """Returns the squares each of the colour to moves pieces can move to, by
+        the index of the square the piece is on
+
+        The moves are only generated once for each position, then drawing the
+        board, checking clicks and checking for checkmate all use the same ones"""
+        if self.legal_moves_hash != self.hash:
+            self.legal_moves = {
+                piece.y * self.size + piece.x: valid_moves
+                for piece, valid_moves in self.get_all_valid_moves(self.turn)
+            }
+            self.legal_moves_hash = self.hash
+
+        return self.legal_moves
+
+    def get_all_move_notations(self) -> typing.List[str]:
         moves: typing.List[str] = []
 
-        for piece in pieces:
-            for move in piece.get_valid_moves(self):
-                square = self.get_square_from_pos((piece.x, piece.y))
-                notation = piece.generate_move_notation(self, square, move)
+        for index, valid_moves in self.get_legal_moves().items():
+            square = self.squares[index]
+            for move in valid_moves:
+                notation = square.occupying_piece.generate_move_notation(
+                    self, square, move
+                )
                 moves.append(notation)
 
         return moves
@@ -0,0 +1,395 @@
+"""The computer player
+
+It searches the moves from a position with iterative deepening: a full search
+one move deep, then two moves deep and so on until it runs out of time, keeping
+the best move from the deepest search that finished. Each search is a negamax
+alpha-beta search, which skips any moves that can be shown not to matter
+because the other side already has a better option elsewhere.
+
+Positions that have already been searched are remembered in a transposition
+table, which is kept between moves so the next search starts with what was
+learnt from the last one. The moves in each position are sorted so the ones
+most likely to be best are searched first (see ordering.py).
+
+When the search reaches its depth it carries on with only captures (a
+quiescence search) until the position is quiet, so it doesn't stop in the middle
+of an exchange and think it has won a piece that is about to be taken back.
+"""
+
+from __future__ import annotations
+
+import time
+import typing
+
+from sharedfiles.evaluation import PIECE_VALUES, evaluate
+from sharedfiles.exchange import get_capture_gain, see
+from sharedfiles.ordering import MoveOrdering, mvv_lva
+from sharedfiles.transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Board
+    from sharedfiles.square import Square
+
+# Bigger than any score evaluate can give, a checkmate in n moves scores
+# MATE - n so quicker mates are preferred
+MATE = 1_000_000
+INFINITY = MATE + 1
+
+MAX_DEPTH = 64
+# The quiescence search can go past the depth, but not forever
+MAX_PLY = MAX_DEPTH * 2
+
+# How much more than what it takes a capture could gain through the position
+# improving, captures that can't get near alpha even with this are skipped
+DELTA_MARGIN = 200
+
+# How often (in nodes) to check if the time is up or the search has been
+# cancelled, a few milliseconds of searching
+TIME_CHECK_INTERVAL = 256
+
+Move = typing.Tuple[int, int]  # (start index, end index) in board.squares
+
+
+class SearchResult(typing.NamedTuple):
+    move: typing.Optional[Move]  # None if there are no legal moves
+    score: int  # From the point of view of the colour to move
+    depth: int  # The deepest search that finished
+    nodes: int
+    seconds: float
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when it runs out of time"""
+
+
+def get_time_budget(board: Board, colour: typing.Optional[str] = None) -> float:
+    """How many seconds to spend on this move, based on the time left on the
+    colours clock and the increment
+
+    It plans for around 30 more moves, plus most of the increment as that is
+    given back after moving. It never uses more than half the time left, so it
+    can't lose on time"""
+    colour = colour or board.turn
+    remaining = board.white_time if colour == "white" else board.black_time
+
+    budget = remaining / 30 + board.increment * 0.75
+    return max(0.01, min(budget, remaining / 2 - 0.05))
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """Mate scores count the moves from the root, but the same position can be
+    reached at a different ply, so they are stored counting from the position"""
+    if score >= MATE - MAX_PLY:
+        return score + ply
+    if score <= -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    """Undoes score_to_table for a position found at ply"""
+    if score >= MATE - MAX_PLY:
+        return score - ply
+    if score <= -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class Engine:
+    def __init__(self, hash_megabytes: float = 16):
+        # Counted across a whole search, reported in the SearchResult
+        self.nodes = 0
+        self.stop_time: typing.Optional[float] = None
+
+        # Checked along with the time, if it returns True the search stops and
+        # returns the best move so far (used to cancel background analysis)
+        self.should_stop: typing.Optional[typing.Callable[[], bool]] = None
+
+        self.transposition_table = TranspositionTable(hash_megabytes)
+        self.ordering = MoveOrdering(MAX_PLY)
+
+        # The copy of the board each search works on, by board size, kept so the
+        # next search only has to change the squares that are different
+        self.boards: typing.Dict[int, Board] = {}
+
+    def search(
+        self,
+        board: Board,
+        time_limit: typing.Optional[float] = None,
+        max_depth: int = MAX_DEPTH,
+        progress: typing.Optional[typing.Callable[[SearchResult], None]] = None,
+    ) -> SearchResult:
+        """Finds the best move for the colour to move, searching deeper until
+        time_limit seconds have passed or max_depth is reached
+
+        The search is done on a copy of the board, so the game being played
+        isn't changed, and the copy is just left as it is if the time runs out
+        part way through a move. progress is called with the result so far each
+        time a depth is finished"""
+        board = board.clone(self.boards.get(board.size))
+        self.boards[board.size] = board
+        start_time = time.perf_counter()
+        self.start_search(board, time_limit)
+
+        moves = self.get_root_moves(board)
+        if not moves:
+            return SearchResult(None, evaluate(board), 0, 0, 0.0)
+
+        best_move = moves[0]
+        best_score = -INFINITY
+        completed_depth = 0
+
+        for depth in range(1, max_depth + 1):
+            # Try the best move from the last search first, so alpha-beta can
+            # skip more of the others
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+            try:
+                score, move = self.search_root(board, moves, depth)
+            except SearchStopped:
+                break
+
+            best_score, best_move, completed_depth = score, move, depth
+            if progress is not None:
+                progress(
+                    SearchResult(
+                        (best_move[0].index, best_move[1].index),
+                        best_score,
+                        completed_depth,
+                        self.nodes,
+                        time.perf_counter() - start_time,
+                    )
+                )
+
+            # There's no point searching deeper once a forced mate is found
+            if abs(best_score) >= MATE - MAX_PLY:
+                break
+
+        return SearchResult(
+            (best_move[0].index, best_move[1].index),
+            best_score,
+            completed_depth,
+            self.nodes,
+            time.perf_counter() - start_time,
+        )
+
+    def start_search(self, board: Board, time_limit: typing.Optional[float] = None):
+        """Resets the counts and limits for a new search from the board"""
+        self.stop_time = None
+        if time_limit is not None:
+            self.stop_time = time.perf_counter() + time_limit
+        self.nodes = 0
+        self.transposition_table.new_search()
+        self.ordering.new_search(board.size)
+
+    def get_root_moves(self, board: Board) -> typing.List[typing.Tuple[Square, Square]]:
+        """The moves to search from the root, in the order to search them first"""
+        moves = self.get_moves(board)
+        entry = self.transposition_table.probe(board.hash)
+        return self.ordering.order(board, moves, 0, entry and entry.move)
+
+    def search_root(
+        self,
+        board: Board,
+        moves: typing.List[typing.Tuple[Square, Square]],
+        depth: int,
+    ) -> typing.Tuple[int, typing.Tuple[Square, Square]]:
+        """Searches every move from the root position to a depth, returning the
+        best score and move"""
+        alpha = -INFINITY
+        best_move = moves[0]
+
+        for start, end in moves:
+            board.make_move(start, end)
+            score = -self.negamax(board, depth - 1, -INFINITY, -alpha, 1)
+            board.unmake_move()
+
+            if score > alpha:
+                alpha = score
+                best_move = (start, end)
+
+        self.transposition_table.store(
+            board.hash,
+            depth,
+            alpha,
+            EXACT,
+            (best_move[0].index, best_move[1].index),
+        )
+        return alpha, best_move
+
+    def negamax(self, board: Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Scores the position from the point of view of the colour to move"""
+        if depth == 0:
+            return self.quiescence(board, alpha, beta, ply)
+
+        self.count_node()
+
+        if board.halfmove_clock >= 100 or self.is_repetition(board):
+            return 0
+
+        # If this position has been searched at least as deep before that
+        # result can be used, as long as it is exact or outside alpha and beta
+        key = board.hash
+        entry = self.transposition_table.probe(key)
+        if entry is not None and entry.depth >= depth:
+            score = score_from_table(entry.score, ply)
+            if (
+                entry.flag == EXACT
+                or (entry.flag == LOWER and score >= beta)
+                or (entry.flag == UPPER and score <= alpha)
+            ):
+                return score
+
+        moves = self.get_moves(board)
+        if not moves:
+            # Checkmate, or a draw by stalemate
+            return -MATE + ply if board.is_in_check(board.turn) else 0
+
+        # The best move from the last time is still worth trying first even if
+        # that search wasn't deep enough to use its score
+        moves = self.ordering.order(board, moves, ply, entry and entry.move)
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+
+        for start, end in moves:
+            board.make_move(start, end)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            undo = board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = (start.index, end.index)
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        # Only quiet moves are remembered, captures (including
+                        # en passant) and promotions are tried early anyway
+                        if undo.captured is None and undo.promoted is None:
+                            self.ordering.add_cutoff(board, start, end, ply, depth)
+                        break
+
+        if best_score >= beta:
+            flag = LOWER
+        elif best_score > original_alpha:
+            flag = EXACT
+        else:
+            flag = UPPER
+        self.transposition_table.store(
+            key, depth, score_to_table(best_score, ply), flag, best_move
+        )
+
+        return best_score
+
+    def quiescence(self, board: Board, alpha: int, beta: int, ply: int) -> int:
+        """Searches only the captures and promotions until there are none worth
+        making, then scores the position
+
+        The colour to move doesn't have to capture, so the score is never worse
+        for them than the position as it stands, unless they are in check and
+        every move has to be searched"""
+        self.count_node()
+
+        # Captures and pawn moves can't repeat a position, so this only matters
+        # for the position the quiescence search started from
+        if board.halfmove_clock >= 100 or self.is_repetition(board):
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(board)
+
+        in_check = board.is_in_check(board.turn)
+        if in_check:
+            best_score = -INFINITY
+        else:
+            # Often the position is already good enough without capturing, in
+            # which case there is no need to even look at the moves
+            best_score = evaluate(board)
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+
+        moves = self.get_moves(board)
+        if not moves:
+            return -MATE + ply if in_check else 0
+
+        if in_check:
+            moves = self.ordering.order(board, moves, ply)
+        else:
+            # Captures that can't get the score back up to alpha even if nothing
+            # is taken back, or that lose material once it is, can't be better
+            # than not capturing so they are left out
+            margin = max(alpha - best_score - DELTA_MARGIN, 1)
+            captures = []
+            for start, end in moves:
+                gain = get_capture_gain(board, start, end)
+                if gain < margin:
+                    continue
+
+                # Taking with a piece worth less can't lose material
+                code = start.occupying_piece.code
+                if PIECE_VALUES[code] > gain and see(board, start, end) < 0:
+                    continue
+                captures.append((mvv_lva(gain, code), start, end))
+
+            # None of them lose material, so they go in MVV-LVA order
+            captures.sort(key=lambda capture: capture[0], reverse=True)
+            moves = [(start, end) for _, start, end in captures]
+
+        for start, end in moves:
+            board.make_move(start, end)
+            score = -self.quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+
+        return best_score
+
+    def count_node(self):
+        """Counts a position searched, stopping the search if the time is up or
+        it has been cancelled"""
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and (
+            (self.stop_time is not None and time.perf_counter() >= self.stop_time)
+            or (self.should_stop is not None and self.should_stop())
+        ):
+            raise SearchStopped
+
+    def get_moves(self, board: Board) -> typing.List[typing.Tuple[Square, Square]]:
+        """Every legal move for the colour to move as (start, end) squares"""
+        squares = board.squares
+        size = board.size
+
+        return [
+            (squares[piece.y * size + piece.x], square)
+            for piece, valid_moves in board.get_all_valid_moves(board.turn)
+            for square in valid_moves
+        ]
+
+    def is_repetition(self, board: Board) -> bool:
+        """Checks if the position has already happened since the last capture or
+        pawn move, in which case it is scored as a draw
+
+        The search board is a copy, so the positions from the game before the
+        search started are in board.history rather than on the undo stack"""
+        undo_stack = board.undo_stack
+        history = board.history
+        moves = len(undo_stack)
+        # The same colour is to move every other position, and positions before
+        # the last capture or pawn move can't happen again
+        for i in range(2, min(board.halfmove_clock, moves + len(history)) + 1, 2):
+            old_hash = undo_stack[-i].hash if i <= moves else history[moves - i]
+            if old_hash == board.hash:
+                return True
+
+        return False
@@ -0,0 +1,156 @@
+"""Scoring positions for the computer player
+
+A position is scored by adding up the value of every piece plus a bonus (or
+penalty) for the square it is on, in centipawns (100 = one pawn). The square
+bonuses are worked out from the shape of the board rather than typed in, so the
+same rules cover 8x8 and 10x10 boards.
+
+There are two sets of bonuses, one for the middlegame and one for the endgame
+(where the king should come out and pawns should push on), and the score is a
+mix of the two depending on how much of the other pieces are left, the phase.
+
+The board keeps the totals up to date as moves are made (see
+Board.make_move), so scoring a position doesn't have to look at every square.
+"""
+
+from __future__ import annotations
+
+import functools
+import typing
+
+from sharedfiles.piece import (
+    BISHOP,
+    COLOURS,
+    KNIGHT,
+    KUEEN,
+    NOTATIONS,
+    PAWN,
+    QUEEN,
+    ROOK,
+    WHITE,
+)
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Board
+
+# How much each piece is worth, by piece code
+# The kueen moves like a queen and a knight so it is worth a bit more than both
+PIECE_VALUES = (100, 320, 330, 500, 900, 1250, 0)
+
+# How much each piece counts towards the phase, by piece code
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 6, 0)
+
+
+class EvaluationTables:
+    def __init__(self, size: int):
+        self.size = size
+
+        # middlegame[colour_code][code][index] is the value of that piece on that
+        # square, counting its material, from whites point of view
+        self.middlegame = self.make_table(endgame=False)
+        self.endgame = self.make_table(endgame=True)
+
+        # The phase with every piece on the board, each side starts with two
+        # knights, bishops and rooks, a queen and two kueens if there is room
+        kueens = 2 if size >= 10 else 0
+        self.opening_phase = 2 * (
+            2 * PHASE_WEIGHTS[KNIGHT]
+            + 2 * PHASE_WEIGHTS[BISHOP]
+            + 2 * PHASE_WEIGHTS[ROOK]
+            + PHASE_WEIGHTS[QUEEN]
+            + kueens * PHASE_WEIGHTS[KUEEN]
+        )
+
+    def make_table(self, endgame: bool) -> typing.List[typing.List[typing.List[int]]]:
+        return [
+            [
+                [
+                    self.get_value(colour, code, index, endgame)
+                    for index in range(self.size * self.size)
+                ]
+                for code in range(len(NOTATIONS))
+            ]
+            for colour in range(len(COLOURS))
+        ]
+
+    def get_value(self, colour: int, code: int, index: int, endgame: bool) -> int:
+        size = self.size
+        x = index % size
+        # How far up the board from its own side the square is, 0 on its back row
+        rank = size - 1 - index // size if colour == WHITE else index // size
+
+        # How close to the middle the square is, from 0 in the corners up to
+        # size - 1 on the middle squares
+        centre = size - 1 - (abs(2 * x - (size - 1)) + abs(2 * rank - (size - 1))) // 2
+
+        if code == PAWN:
+            # Pawns get better as they go up the board, especially in the middle
+            # and even more so once there are fewer pieces to stop them
+            bonus = rank * 10 if endgame else rank * 5 + (centre * 2 if rank > 1 else 0)
+        elif code == KNIGHT:
+            bonus = centre * 8 - 30
+        elif code in (BISHOP, KUEEN):
+            bonus = centre * 4 - 10
+        elif code == ROOK:
+            # Rooks like the row the other sides pawns start on
+            bonus = 20 if rank == size - 2 else 0
+        elif code == QUEEN:
+            bonus = centre * 2 - 5
+        elif endgame:
+            # With few pieces left the king is safe to help in the middle
+            bonus = centre * 6 - 20
+        else:
+            # Kings should stay tucked away on their back row in the middlegame
+            bonus = (10 if rank == 0 else -10 * rank) - centre * 3
+
+        value = PIECE_VALUES[code] + bonus
+        return value if colour == WHITE else -value
+
+
+@functools.lru_cache(maxsize=None)
+def get_evaluation_tables(size: int) -> EvaluationTables:
+    """Returns the tables for a board size, making them the first time"""
+    return EvaluationTables(size)
+
+
+class EvaluationTotals(typing.NamedTuple):
+    """What Board keeps up to date for scoring the position"""
+
+    middlegame: int  # Piece values and middlegame bonuses, from whites view
+    endgame: int  # The same with endgame bonuses
+    phase: int  # Phase weights of all the pieces on the board
+    material: typing.Tuple[int, int]  # Each colours piece values, by colour code
+
+
+def count_totals(board: Board) -> EvaluationTotals:
+    """Adds up the totals from scratch by looking at every square
+
+    The board only needs this when it is set up, after that it keeps them up to
+    date itself"""
+    tables = board.evaluation_tables
+    middlegame = endgame = phase = 0
+    material = [0, 0]
+
+    for square in board.squares:
+        piece = square.occupying_piece
+        if piece is not None:
+            colour_code, code = piece.colour_code, piece.code
+            middlegame += tables.middlegame[colour_code][code][square.index]
+            endgame += tables.endgame[colour_code][code][square.index]
+            phase += PHASE_WEIGHTS[code]
+            material[colour_code] += PIECE_VALUES[code]
+
+    return EvaluationTotals(middlegame, endgame, phase, tuple(material))
+
+
+def evaluate(board: Board) -> int:
+    """Scores the position from the point of view of the colour to move"""
+    opening_phase = board.evaluation_tables.opening_phase
+    # Promotions can take the phase past the start
+    phase = min(board.phase, opening_phase)
+
+    score = (
+        board.middlegame_score * phase + board.endgame_score * (opening_phase - phase)
+    ) // opening_phase
+
+    return score if board.turn == "white" else -score
@@ -0,0 +1,144 @@
+"""Static exchange evaluation (SEE)
+
+Works out whether a capture wins material by imagining both sides taking back
+on that square in turn, always with their least valuable piece, without making
+any of the moves. Either side can stop taking back when carrying on would lose
+them more, so the result is what the capture gains if both sides play the
+exchange as well as they can.
+
+It looks outwards from the square using the same tables as
+Board.is_square_attacked. Pieces that have already taken are ignored, so a rook
+or bishop lined up behind another piece joins in once that piece has gone.
+Pins and checks are not taken into account, which is what keeps it quick.
+"""
+
+from __future__ import annotations
+
+import typing
+
+from sharedfiles.evaluation import PIECE_VALUES
+from sharedfiles.piece import (
+    DIAGONAL_SLIDERS,
+    KING,
+    KNIGHT_JUMPERS,
+    PAWN,
+    QUEEN,
+    STRAIGHT_SLIDERS,
+)
+from sharedfiles.tables import STRAIGHT
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Board
+    from sharedfiles.square import Square
+
+# The king is worth nothing in the evaluation as it never leaves the board, but
+# in an exchange it can only take last, as taking a defended piece is illegal
+EXCHANGE_VALUES = PIECE_VALUES[:KING] + (100_000,)
+
+
+def get_capture_gain(board: Board, start: Square, end: Square) -> int:
+    """The value of what a move takes, plus the extra for a promotion"""
+    piece = start.occupying_piece
+    victim = end.occupying_piece
+
+    gain = 0
+    if victim is not None:
+        gain = PIECE_VALUES[victim.code]
+    elif piece.code == PAWN and start.x != end.x:
+        gain = PIECE_VALUES[PAWN]  # En passant
+
+    if piece.code == PAWN and end.y in (0, board.size - 1):
+        gain += PIECE_VALUES[QUEEN] - PIECE_VALUES[PAWN]
+
+    return gain
+
+
+def get_least_valuable_attacker(
+    board: Board, index: int, colour_code: int, taken: typing.Set[int]
+) -> typing.Optional[int]:
+    """Finds the index of a colours least valuable piece that could capture on
+    a square, ignoring the pieces on the taken squares"""
+    squares = board.squares
+    tables = board.tables
+    best = None
+    best_value = EXCHANGE_VALUES[KING] + 1
+
+    for table, jumpers in (
+        # Pawns capture diagonally forward, so look diagonally backwards for them
+        (tables.pawn_captures[1 - colour_code], (PAWN,)),
+        (tables.knight, KNIGHT_JUMPERS),
+        (tables.king, (KING,)),
+    ):
+        for i in table[index]:
+            piece = squares[i].occupying_piece
+            if (
+                piece is not None
+                and piece.colour_code == colour_code
+                and piece.code in jumpers
+                and i not in taken
+                and EXCHANGE_VALUES[piece.code] < best_value
+            ):
+                best = i
+                best_value = EXCHANGE_VALUES[piece.code]
+
+        # Nothing is cheaper than a pawn
+        if best_value == EXCHANGE_VALUES[PAWN]:
+            return best
+
+    for direction, ray in enumerate(tables.rays[index]):
+        sliders = STRAIGHT_SLIDERS if direction in STRAIGHT else DIAGONAL_SLIDERS
+        for i in ray:
+            piece = squares[i].occupying_piece
+            if piece is None or i in taken:
+                continue
+            if (
+                piece.colour_code == colour_code
+                and piece.code in sliders
+                and EXCHANGE_VALUES[piece.code] < best_value
+            ):
+                best = i
+                best_value = EXCHANGE_VALUES[piece.code]
+            break
+
+    return best
+
+
+def see(board: Board, start: Square, end: Square) -> int:
+    """How much material the move from start to end wins (or loses, if it is
+    negative) once the exchange on end is over"""
+    squares = board.squares
+    index = end.index
+    piece = start.occupying_piece
+    taken = {start.index}
+
+    # gains[n] is what the side making the nth capture has won so far, if the
+    # other side doesn't take back
+    gains = [get_capture_gain(board, start, end)]
+    # What would be taken next is the piece that has just taken
+    on_square = EXCHANGE_VALUES[piece.code]
+    if piece.code == PAWN and end.y in (0, board.size - 1):
+        on_square = EXCHANGE_VALUES[QUEEN]
+    colour_code = 1 - piece.colour_code
+
+    while True:
+        attacker = get_least_valuable_attacker(board, index, colour_code, taken)
+        if attacker is None:
+            break
+
+        # If taking back is bad for this side whatever happens after, it won't
+        # and there is no need to look further
+        gain = on_square - gains[-1]
+        if max(-gains[-1], gain) < 0:
+            break
+        gains.append(gain)
+
+        taken.add(attacker)
+        on_square = EXCHANGE_VALUES[squares[attacker].occupying_piece.code]
+        colour_code = 1 - colour_code
+
+    # Work back from the last capture, each side only taking back if it helps
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = -max(-gains[-1], last)
+
+    return gains[0]
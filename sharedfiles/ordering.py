@@ -0,0 +1,127 @@
+"""Choosing which moves the engine searches first
+
+Alpha-beta can skip the rest of a position's moves as soon as one is found that
+is too good for the other side to allow, so the sooner a good move is searched
+the less work there is. The moves most likely to be good are tried first:
+1. the best move from the last time the position was searched (the hash move)
+2. captures, most valuable piece taken first and then least valuable piece
+   taking it (MVV-LVA), with promotions counted as taking a queen
+3. killer moves, quiet moves that were too good in another position at the same
+   ply and so are likely to be here as well
+4. captures that lose material once the other side takes back (see exchange.py)
+5. every other move, by how often it has been too good before (history)
+"""
+
+from __future__ import annotations
+
+import typing
+
+from sharedfiles.evaluation import PIECE_VALUES
+from sharedfiles.exchange import get_capture_gain, see
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Board
+    from sharedfiles.square import Square
+
+# The order the groups of moves are tried in, history scores stay below killers
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORES = (1 << 27, (1 << 27) - 1)
+LOSING_CAPTURE_SCORE = (1 << 26) + 1
+MAX_HISTORY = 1 << 26
+
+KILLERS_PER_PLY = 2
+
+
+def mvv_lva(gain: int, code: int) -> int:
+    """How good a capture looks before anything takes back, most valuable piece
+    taken first then least valuable piece taking it
+
+    Piece codes go up with their value, apart from the king which is last
+    anyway, so the code is used for the least valuable"""
+    return gain * 8 - code
+
+
+class MoveOrdering:
+    def __init__(self, max_ply: int):
+        self.max_ply = max_ply
+        self.size = 0
+
+        # killers[ply] is the last quiet moves to cause a cutoff at that ply, as
+        # start index * squares + end index
+        self.killers: typing.List[typing.List[int]] = []
+
+        # history[colour_code][start index * squares + end index] goes up each
+        # time the move causes a cutoff, more for deeper searches
+        self.history: typing.List[typing.List[int]] = []
+
+    def new_search(self, size: int):
+        """Clears the killers, which only apply to the positions in one search,
+        and halves the history so older searches count for less"""
+        self.killers = [[-1] * KILLERS_PER_PLY for _ in range(self.max_ply + 1)]
+
+        if size != self.size:
+            self.size = size
+            squares = size * size
+            self.history = [[0] * squares * squares for _ in range(2)]
+        else:
+            for table in self.history:
+                table[:] = [value >> 1 for value in table]
+
+    def order(
+        self,
+        board: Board,
+        moves: typing.List[typing.Tuple[Square, Square]],
+        ply: int,
+        hash_move: typing.Optional[typing.Tuple[int, int]] = None,
+    ) -> typing.List[typing.Tuple[Square, Square]]:
+        """Sorts the moves so the ones most likely to be best come first"""
+        size = board.size
+        squares = size * size
+        history = self.history[board.turn != "white"]
+        killers = self.killers[ply] if ply <= self.max_ply else ()
+        hash_key = -1 if hash_move is None else hash_move[0] * squares + hash_move[1]
+
+        def score(move: typing.Tuple[Square, Square]) -> int:
+            start, end = move
+            key = start.index * squares + end.index
+            if key == hash_key:
+                return HASH_MOVE_SCORE
+
+            gain = get_capture_gain(board, start, end)
+            if gain:
+                code = start.occupying_piece.code
+                # Taking with a piece worth less can't lose material, otherwise
+                # check what happens once the other side takes back
+                if PIECE_VALUES[code] > gain and see(board, start, end) < 0:
+                    return LOSING_CAPTURE_SCORE + mvv_lva(gain, code)
+
+                return CAPTURE_SCORE + mvv_lva(gain, code)
+
+            for i, killer in enumerate(killers):
+                if key == killer:
+                    return KILLER_SCORES[i]
+
+            return history[key]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def add_cutoff(
+        self, board: Board, start: Square, end: Square, ply: int, depth: int
+    ):
+        """Remembers a quiet move that was too good for the other side"""
+        key = start.index * board.size * board.size + end.index
+
+        if ply <= self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != key:
+                killers[1] = killers[0]
+                killers[0] = key
+
+        history = self.history[board.turn != "white"]
+        history[key] += depth * depth
+        if history[key] > MAX_HISTORY:
+            # Keep history below the killers, halving everything so the order
+            # between moves stays the same
+            for table in self.history:
+                table[:] = [value >> 1 for value in table]
@@ -0,0 +1,236 @@
+"""Searching with more than one CPU core
+
+Python can only run one thread at a time, so to use more cores the search is
+split between processes. It is split at the root: each move from the position
+is searched separately by whichever process is free, using the same Engine as
+a normal search.
+
+The first move (the best one from the last depth) is searched serially, on its
+own by one process while the others wait, to get a score for the others to
+beat. Then the rest are shared out. Most of them can't beat it, and proving that
+is much quicker than finding their exact score. Any that do beat it come back
+with their exact score, so the best move and score are the same as from
+Engine.search at the same depth.
+
+Because of that serial first move, and the snapshots and results going between
+processes, it is only faster with more than one core. On a single core it is
+slower than Engine.search. benchmark.py and tests/test_parallel.py measure the
+speedup on machines with more than one core.
+
+Each process has its own transposition table rather than one shared between
+them (like lazy SMP). Sharing it would make the results depend on which
+process got where first, so they would no longer match a single process.
+
+Run it with python -m sharedfiles.parallel --help to compare the time taken
+against a single process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import time
+import typing
+
+from sharedfiles.board import Board
+from sharedfiles.engine import (
+    INFINITY,
+    MATE,
+    MAX_DEPTH,
+    MAX_PLY,
+    Engine,
+    SearchResult,
+)
+from sharedfiles.perft import POSITIONS, Position, setup_position
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Snapshot
+
+Move = typing.Tuple[int, int]  # (start index, end index) in board.squares
+
+
+class RootTask(typing.NamedTuple):
+    """One root move for a worker to search"""
+
+    search_id: int  # Workers reset their engine when this changes
+    snapshot: Snapshot
+    move: Move
+    depth: int
+    alpha: int  # The score to beat
+
+
+# The engine and a board for each size in each worker process, set up by
+# init_worker when the process starts
+worker_engine: typing.Optional[Engine] = None
+worker_boards: typing.Dict[int, Board] = {}
+worker_search_id = -1
+
+
+def init_worker(hash_megabytes: float):
+    global worker_engine
+    worker_engine = Engine(hash_megabytes)
+
+
+def get_worker_id(_) -> int:
+    return os.getpid()
+
+
+def search_root_move(task: RootTask) -> typing.Tuple[int, int]:
+    """Searches one root move in a worker, returning its score from the root
+    colours point of view and how many positions were searched"""
+    global worker_search_id
+
+    size = task.snapshot.size
+    if size not in worker_boards:
+        worker_boards[size] = Board(800, 800, size)
+    board = worker_boards[size]
+    board.restore(task.snapshot)
+
+    engine = worker_engine
+    if task.search_id != worker_search_id:
+        engine.start_search(board)
+        worker_search_id = task.search_id
+
+    nodes = engine.nodes
+    start, end = task.move
+    board.make_move(board.squares[start], board.squares[end])
+    score = -engine.negamax(board, task.depth - 1, -INFINITY, -task.alpha, 1)
+
+    return score, engine.nodes - nodes
+
+
+class ParallelEngine:
+    def __init__(
+        self, processes: typing.Optional[int] = None, hash_megabytes: float = 16
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.search_id = 0
+
+        # spawn so the workers don't get a copy of the game (and pygame)
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(
+            self.processes, initializer=init_worker, initargs=(hash_megabytes,)
+        )
+        # Wait for the workers to start, so it isn't counted in the first search
+        self.pool.map(get_worker_id, range(self.processes))
+
+        # Only used to put the root moves in the same order as Engine.search
+        self.engine = Engine(hash_megabytes=0)
+
+    def search(self, board: Board, max_depth: int = MAX_DEPTH) -> SearchResult:
+        """Finds the best move for the colour to move by searching every depth
+        up to max_depth, like Engine.search without a time limit
+
+        At each depth the first move is searched serially before the rest are
+        searched at the same time"""
+        start_time = time.perf_counter()
+        self.search_id += 1
+        snapshot = board.snapshot()
+
+        self.engine.start_search(board)
+        moves = [
+            (start.index, end.index) for start, end in self.engine.get_root_moves(board)
+        ]
+        if not moves:
+            return SearchResult(None, 0, 0, 0, 0.0)
+
+        best_move = moves[0]
+        best_score = -INFINITY
+        completed_depth = 0
+        nodes = 0
+
+        for depth in range(1, max_depth + 1):
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+            # The first move gets a full search so the others have a score to
+            # beat, then they are all searched at once
+            alpha, first_nodes = self.pool.apply(
+                search_root_move,
+                (RootTask(self.search_id, snapshot, moves[0], depth, -INFINITY),),
+            )
+            nodes += first_nodes
+            best_move = moves[0]
+
+            results = self.pool.map(
+                search_root_move,
+                [
+                    RootTask(self.search_id, snapshot, move, depth, alpha)
+                    for move in moves[1:]
+                ],
+                chunksize=1,
+            )
+
+            # Go through them in order, like a single process would, so moves
+            # with the same score are picked the same way
+            for move, (score, move_nodes) in zip(moves[1:], results):
+                nodes += move_nodes
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+
+            best_score, completed_depth = alpha, depth
+            if abs(best_score) >= MATE - MAX_PLY:
+                break
+
+        return SearchResult(
+            best_move,
+            best_score,
+            completed_depth,
+            nodes,
+            time.perf_counter() - start_time,
+        )
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def main(args: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Compare a parallel search against a single process"
+    )
+    parser.add_argument(
+        "position",
+        nargs="?",
+        default="kiwipete",
+        choices=[position.name for position in POSITIONS],
+    )
+    parser.add_argument("-d", "--depth", type=int, default=4)
+    parser.add_argument(
+        "-p", "--processes", type=int, default=None, help="defaults to every core"
+    )
+    parser.add_argument("--fen", help="search from this position instead")
+    options = parser.parse_args(args)
+
+    if options.fen is not None:
+        size = options.fen.split()[0].count("/") + 1
+        position = Position("fen", size, options.fen, [])
+    else:
+        position = next(p for p in POSITIONS if p.name == options.position)
+    board = setup_position(position)
+
+    single = Engine().search(board, max_depth=options.depth)
+    print(
+        f"1 process: {single.move} scores {single.score}, {single.nodes} nodes "
+        f"in {single.seconds:.3f}s"
+    )
+
+    engine = ParallelEngine(options.processes)
+    try:
+        parallel = engine.search(board, options.depth)
+    finally:
+        engine.close()
+    print(
+        f"{engine.processes} processes: {parallel.move} scores {parallel.score}, "
+        f"{parallel.nodes} nodes in {parallel.seconds:.3f}s"
+    )
+
+    print(f"Speedup: {single.seconds / parallel.seconds:.2f}x")
+    matches = (single.move, single.score) == (parallel.move, parallel.score)
+    print("Same move and score" if matches else "Different move or score")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Perft, counting every position reachable in a number of moves
+
+The counts for well known positions are published, so if the move generator
+gives a different number there is a bug in it somewhere. divide splits the
+count up by the first move so the bug can be tracked down to one move.
+
+Pawns here always promote to a queen, so for positions where a pawn can promote
+within the depth searched the counts are lower than the published ones (which
+include promoting to a rook, bishop or knight). Those counts were checked against
+a simple generator that makes every move and looks for check afterwards.
+
+Any other position can be counted by giving its FEN with --fen
+
+Run it with python -m sharedfiles.perft --help
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import typing
+
+from sharedfiles.board import Board
+from sharedfiles.piece import COLOURS
+
+
+class Position(typing.NamedTuple):
+    """A position to test and the correct count for each depth starting from 1"""
+
+    name: str
+    size: int
+    fen: str
+    counts: typing.List[int]
+
+
+POSITIONS = [
+    Position(
+        "start",
+        8,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        [20, 400, 8902, 197281, 4865609],
+    ),
+    # Lots of castling, pins and en passant
+    Position(
+        "kiwipete",
+        8,
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862],
+    ),
+    # An endgame with en passant that would leave the king in check
+    Position(
+        "endgame",
+        8,
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624],
+    ),
+    # Promotions and captures of promoting pawns
+    Position(
+        "promotions",
+        8,
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 228, 8087],
+    ),
+    Position(
+        "discovered",
+        8,
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [41, 1373, 54007],
+    ),
+    Position(
+        "kueen start",
+        10,
+        "rnbwqkwbnr/pppppppppp/10/10/10/10/10/10/PPPPPPPPPP/RNBWQKWBNR w KQkq - 0 1",
+        [28, 784, 27438],
+    ),
+    # Both sides developed, with kueens and castling on either side
+    Position(
+        "kueen middlegame",
+        10,
+        "r2w1k1b1r/ppp1qppppp/2np2wn2/4p5/10/4P5/8B1/2NP1W1N2/PPP1QPPPPP/R2W1K1B1R "
+        "w KQkq - 0 1",
+        [67, 3911, 260481],
+    ),
+]
+
+
+def setup_position(position: Position, move_generator: str = "objects") -> Board:
+    """Makes a board set up with a test position"""
+    return Board(
+        800, 800, position.size, move_generator=move_generator, fen=position.fen
+    )
+
+
+def perft(board: Board, depth: int) -> int:
+    """Counts the positions reachable from this one in exactly depth moves"""
+    if depth == 0:
+        return 1
+
+    if board.bitboards is not None:
+        return perft_bitboards(board, depth)
+
+    moves = board.get_all_valid_moves(board.turn)
+
+    # There is no need to make the last move just to count it
+    if depth == 1:
+        return sum(len(squares) for _, squares in moves)
+
+    nodes = 0
+    for piece, squares in moves:
+        start = board.squares[piece.y * board.size + piece.x]
+        for square in squares:
+            board.make_move(start, square)
+            nodes += perft(board, depth - 1)
+            board.unmake_move()
+
+    return nodes
+
+
+def perft_bitboards(board: Board, depth: int) -> int:
+    """The same as perft for boards using the bitboard generator, with the moves
+    as (start index, end index) straight from the bitboards and the last ones
+    counted without being listed"""
+    bitboards = board.bitboards
+    colour = COLOURS.index(board.turn)
+    if depth == 1:
+        return bitboards.count_moves(colour)
+
+    squares = board.squares
+    nodes = 0
+    for start, end in bitboards.generate_moves(colour):
+        board.make_move(squares[start], squares[end])
+        nodes += perft_bitboards(board, depth - 1)
+        board.unmake_move()
+
+    return nodes
+
+
+def divide(board: Board, depth: int) -> typing.Dict[str, int]:
+    """The perft count after each first move, keyed by the moves notation"""
+    output = {}
+
+    for piece, squares in board.get_all_valid_moves(board.turn):
+        start = board.squares[piece.y * board.size + piece.x]
+        for square in squares:
+            notation = f"{start.coord}{square.coord}"
+            board.make_move(start, square)
+            output[notation] = perft(board, depth - 1)
+            board.unmake_move()
+
+    return output
+
+
+def timed_perft(board: Board, depth: int) -> typing.Tuple[int, float]:
+    """Runs perft and also returns how long it took"""
+    start_time = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start_time
+
+
+def main(args: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Count the positions reachable from a test position"
+    )
+    parser.add_argument(
+        "position",
+        nargs="?",
+        default="start",
+        choices=[position.name for position in POSITIONS],
+    )
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument(
+        "-g", "--generator", choices=("objects", "bitboard"), default="objects"
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="show the count for each first move"
+    )
+    parser.add_argument("--fen", help="count from this position instead")
+    options = parser.parse_args(args)
+
+    if options.fen is not None:
+        # The board is as wide as the number of rows in the FEN
+        size = options.fen.split()[0].count("/") + 1
+        position = Position("fen", size, options.fen, [])
+    else:
+        position = next(p for p in POSITIONS if p.name == options.position)
+    board = setup_position(position, options.generator)
+
+    if options.divide:
+        for notation, nodes in sorted(divide(board, options.depth).items()):
+            print(f"{notation}: {nodes}")
+
+    nodes, seconds = timed_perft(board, options.depth)
+    print(f"Nodes: {nodes}")
+    print(f"Time: {seconds:.3f}s ({nodes / seconds:.0f} nodes/s)")
+
+    if 0 < options.depth <= len(position.counts):
+        expected = position.counts[options.depth - 1]
+        print("Correct" if nodes == expected else f"Wrong, expected {expected}")
+
+
+if __name__ == "__main__":
+    main()
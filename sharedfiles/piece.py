@@ -1,21 +1,50 @@
 from __future__ import annotations
 
-import copy
 import typing
 
-import pygame
-
 if typing.TYPE_CHECKING:
-    from sharedfiles.board import Board
+    from sharedfiles.board import Board, CheckInfo
     from sharedfiles.square import Square
 
+# (x, y) steps for each direction a piece can move in, north is up the screen
+STRAIGHT_DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # north, east, south, west
+DIAGONAL_DIRECTIONS = [(1, -1), (1, 1), (-1, 1), (-1, -1)]  # ne, se, sw, nw
+# north, north east, east, south east, south, south west, west, north west
+ALL_DIRECTIONS = [
+    direction
+    for pair in zip(STRAIGHT_DIRECTIONS, DIAGONAL_DIRECTIONS)
+    for direction in pair
+]
+KNIGHT_MOVES = [(1, -2), (2, -1), (2, 1), (1, 2), (-1, 2), (-2, 1), (-2, -1), (-1, -2)]
+
+# Small integer codes for colours and pieces, so the move generation can compare
+# and index with them rather than strings
+WHITE, BLACK = 0, 1
+COLOURS = ("white", "black")  # The colour for each code
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KUEEN, KING = range(7)
+NOTATIONS = (" ", "N", "B", "R", "Q", "W", "K")  # The notation for each code
+
+# The pieces that move in straight lines, diagonal lines and like a knight
+STRAIGHT_SLIDERS = (ROOK, QUEEN, KUEEN)
+DIAGONAL_SLIDERS = (BISHOP, QUEEN, KUEEN)
+KNIGHT_JUMPERS = (KNIGHT, KUEEN)
+
 
 class Piece:
+    # Pieces only have these attributes, so they don't each need a __dict__
+    # Every sub-class also needs __slots__ (even if empty) for this to work
+    __slots__ = ("pos", "x", "y", "colour", "colour_code", "has_moved")
+
+    # Set by each of the piece sub-classes
+    notation: str = ""
+    code: int = -1
+
     def __init__(self, pos: typing.Tuple[int, int], colour: str):
         self.pos: typing.Tuple(int, int) = pos
         self.x: int = pos[0]
         self.y: int = pos[1]
         self.colour: str = colour
+        self.colour_code: int = COLOURS.index(colour)
         self.has_moved: bool = False
 
     def __str__(self) -> str:
@@ -23,10 +52,13 @@ class Piece:
 
     def get_moves(self, board: Board) -> typing.List[Square]:
         output = []
+        squares = board.squares
+        colour = self.colour_code
         for direction in self.get_possible_moves(board):
-            for square in direction:
+            for i in direction:
+                square = squares[i]
                 if square.occupying_piece is not None:
-                    if square.occupying_piece.colour == self.colour:
+                    if square.occupying_piece.colour_code == colour:
                         break
 
                     output.append(square)
@@ -35,112 +67,78 @@ class Piece:
                 output.append(square)
         return output
 
-    def get_valid_moves(self, board: Board) -> typing.List[Square]:
+    def get_valid_moves(
+        self, board: Board, check_info: typing.Optional[CheckInfo] = None
+    ) -> typing.List[Square]:
+        """Returns the squares the piece can move to without leaving its king in
+        check. check_info can be passed in if it has already been worked out for
+        this position"""
+        # Boards using bitboards generate the moves themselves
+        if board.bitboards is not None:
+            return board.bitboards.get_valid_moves(self)
+
+        if check_info is None:
+            check_info = board.get_check_info(self.colour)
+
+        # If in check the piece has to block it or take the checking piece, and if
+        # pinned it can't leave the line it is pinned along
+        block = check_info.block
+        pinned = check_info.pins.get(self.y * board.size + self.x)
+
         output = []
         for square in self.get_moves(board):
-            # Checks moving the piece would not put yourself in check
-            # making it an illegal move
-            if not board.is_in_check(self.colour, board_change=[self.pos, square.pos]):
+            if square.index == board.en_passant and self.code == PAWN:
+                # En passant takes a piece that isn't on the square moved to, so it
+                # is checked by actually making the move
+                if not board.is_in_check(
+                    self.colour, board_change=[self.pos, square.pos]
+                ):
+                    output.append(square)
+
+            elif (block is None or square.index in block) and (
+                pinned is None or square.index in pinned
+            ):
                 output.append(square)
+
         return output
 
-    def move(
-        self,
-        board: Board,
-        square: Square,
-        force: bool = False,
-        skip_generation: bool = False,
-    ) -> bool:
+    def move(self, board: Board, square: Square, force: bool = False) -> bool:
         """Moves a piece on the board. If force=True it will move even if it wouldn't
-        normally be possible, for example when castling the king and rook need to go
-        past each other
+        normally be possible
+
+        This is for moves made by the players, it records the move and updates the
+        clocks, then uses board.make_move to actually move the pieces
         """
-        # un-highlight all the squares
-        for i in board.squares:
-            i.highlight = False
+        # The moves for the colour to move have already been worked out this turn
+        if self.colour == board.turn:
+            valid_moves = board.get_legal_moves().get(self.y * board.size + self.x, [])
+        else:
+            valid_moves = self.get_valid_moves(board)
 
-        if square in self.get_valid_moves(board) or force:
+        if square in valid_moves or force:
             prev_square = board.get_square_from_pos(self.pos)
-            square_copy = copy.copy(square)
+            captured = square.occupying_piece is not None
 
-            if square.occupying_piece is None:
-                pygame.mixer.music.load("sharedfiles/sounds/move.mp3")
-            else:
-                pygame.mixer.music.load("sharedfiles/sounds/capture.mp3")
-
-            board.move_count += 1
             board.moves.append(
-                (self.generate_move_notation(board, prev_square, square) or "some move")
-            ) if not skip_generation else ""
+                self.generate_move_notation(board, prev_square, square) or "some move"
+            )
             print(board.moves[-1] if board.moves[-1] != "some move" else "")
 
-            self.pos, self.x, self.y = square.pos, square.x, square.y
-            pygame.mixer.music.play()
-
             if board.turn == "white":
                 board.white_time += board.increment
             else:
                 board.black_time += board.increment
 
-            # Set the square we were on before to having nothing
-            # and the new one as having this piece
-            prev_square.occupying_piece = None
-            square.occupying_piece = self
+            # Moves the piece (and the rook if castling, or the pawn taken by
+            # en passant) and makes it the other colours turn
+            board.make_move(prev_square, square)
 
-            # Unselect the piece and mark the piece as having moved
-            # important for things like castling and en-pasant
+            # Unselect the piece
             board.selected_piece = None
-            self.has_moved = True
 
-            # Pawn promotion or en passant
-            if self.notation == " ":
-                if self.y == 0 or self.y == (board.size - 1):
-                    # Promotes immediately to a queen
-                    # as its easier than letting the user choose
-                    from sharedfiles.pieces.queen import Queen
-
-                    square.occupying_piece = Queen((self.x, self.y), self.colour, board)
-
-                # If it has moved 2 forward, mark en pasant possible as True
-                if abs(prev_square.y - square.y) == 2:
-                    self.en_passant_possible = True
-
-                # If it has taken a piece
-                # If it was from en pasant, we need to remove the old piece
-                # We can tell if it was by en pasant if there was no piece in the square
-                # before we moved
-
-                if (
-                    abs(prev_square.x - square.x) == 1
-                    and square_copy.occupying_piece is None
-                ):
-                    # print("Taken via en passant")
-                    # It was from en pasant
-                    board.get_square_from_pos(
-                        (self.x, prev_square.y)
-                    ).occupying_piece = None
-
-            # Move rook if king castles
-            if self.notation == "K":
-                # If it has moved 2 squares
-                if prev_square.x - self.x == 2:
-                    # Move the rook
-                    rook = board.get_piece_from_pos((0, self.y))
-                    rook.move(
-                        board,
-                        board.get_square_from_pos((self.x + 1, self.y)),
-                        force=True,
-                        skip_generation=True,
-                    )
-
-                elif prev_square.x - self.x == -2:
-                    rook = board.get_piece_from_pos((board.size - 1, self.y))
-                    rook.move(
-                        board,
-                        board.get_square_from_pos((self.x - 1, self.y)),
-                        force=True,
-                        skip_generation=True,
-                    )
+            # Let anything watching the board (sounds, rendering) know about it
+            for listener in board.move_listeners:
+                listener(prev_square, square, captured)
 
             return True
 
@@ -152,9 +150,9 @@ class Piece:
     def attacking_squares(self, board: Board):
         return self.get_moves(board)
 
-    def get_possible_moves(
-        self, board: Board
-    ) -> typing.Union[typing.List[Square], typing.List[typing.List[Square]]]:
+    def get_possible_moves(self, board: Board) -> typing.Sequence[typing.Sequence[int]]:
+        """Returns the squares the piece could move to on an empty board, as indexes
+        into board.squares grouped by the direction they are in, nearest first"""
         raise NotImplementedError(
             "Call this method on one of the piece sub-classes not on this base class"
         )
@@ -2,97 +2,92 @@ from __future__ import annotations
 
 import typing
 
-import pygame
-
-from sharedfiles.piece import Piece
+from sharedfiles.piece import KING, Piece
 
 if typing.TYPE_CHECKING:
     from sharedfiles.board import Board
 
+# Castling rights, stored as bits of Board.castling_rights
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+CASTLING_RIGHTS = {
+    "white": (WHITE_KINGSIDE, WHITE_QUEENSIDE),
+    "black": (BLACK_KINGSIDE, BLACK_QUEENSIDE),
+}
 
-class King(Piece):
-    def __init__(self, pos, colour, board: Board):
-        super().__init__(pos, colour)
-
-        # Sets up the image, scales it and sets up the notation
-        img_path = "sharedfiles/imgs/" + colour[0] + "_king.png"
-        self.img = pygame.image.load(img_path)
 
-        scale_factor = 11 / 15
-        self.img = pygame.transform.scale(
-            self.img,
-            (board.tile_width * scale_factor, board.tile_height * scale_factor),
-        )
-        self.notation = "K"
+class King(Piece):
+    __slots__ = ()
+    notation = "K"
+    code = KING
 
     def get_possible_moves(self, board: Board):
         """Returns a list of the possible moves that the king
         can take on the current board"""
 
-        output = []
-        moves = [
-            (0, -1),  # north
-            (1, -1),  # north east
-            (1, 0),  # east
-            (1, 1),  # south east
-            (0, 1),  # south
-            (-1, 1),  # south west
-            (-1, 0),  # west
-            (-1, -1),  # north west
-        ]
-
-        for move in moves:
-            new_pos = (self.x + move[0], self.y + move[1])
-            if (
-                new_pos[0] < board.size
-                and new_pos[0] >= 0
-                and new_pos[1] < board.size
-                and new_pos[1] >= 0
-            ):
-                output.append([board.get_square_from_pos(new_pos)])
-
-        return output
+        return board.tables.king_moves[self.y * board.size + self.x]
 
     def can_castle(self, board: Board) -> typing.Optional[typing.List[str]]:
         castles = []
-
-        if not self.has_moved:
-            kingside_rook = board.get_piece_from_pos((board.size - 1, self.y))
-            queenside_rook = board.get_piece_from_pos((0, self.y))
-
-            if (
-                queenside_rook is not None
-                and not queenside_rook.has_moved
-                and [board.get_piece_from_pos((i, self.y)) for i in range(1, self.x)]
-                == [None for _ in range(1, self.x)]
-            ):
-                castles.append("queenside")
-
-            if (
-                kingside_rook is not None
-                and not kingside_rook.has_moved
-                and [
-                    board.get_piece_from_pos((i, self.y))
-                    for i in range(self.x + 1, board.size - 1)
-                ]
-                == [None for _ in range(self.x + 1, board.size - 1)]
-            ):
-                castles.append("kingside")
+        kingside, queenside = CASTLING_RIGHTS[self.colour]
+        enemy = "white" if self.colour == "black" else "black"
+        row = board.squares[self.y * board.size : (self.y + 1) * board.size]
+
+        # You can't castle out of check
+        if not board.castling_rights & (kingside | queenside) or (
+            board.is_square_attacked(row[self.x], enemy)
+        ):
+            return castles
+
+        # Neither the king or that rook can have moved, the squares between them
+        # must be empty and the king can't move through or into check
+        if (
+            board.castling_rights & queenside
+            and all(square.occupying_piece is None for square in row[1 : self.x])
+            and not any(
+                board.is_square_attacked(square, enemy)
+                for square in row[self.x - 2 : self.x]
+            )
+        ):
+            castles.append("queenside")
+
+        if (
+            board.castling_rights & kingside
+            and all(square.occupying_piece is None for square in row[self.x + 1 : -1])
+            and not any(
+                board.is_square_attacked(square, enemy)
+                for square in row[self.x + 1 : self.x + 3]
+            )
+        ):
+            castles.append("kingside")
 
         return castles
 
-    def get_valid_moves(self, board: Board):
-        output = []
-
-        for square in self.get_moves(board):
-            # If moving doesn't put the king in check, allow it to move there
-            if not board.is_in_check(self.colour, board_change=[self.pos, square.pos]):
-                output.append(square)
+    def get_valid_moves(self, board: Board, check_info=None):
+        # Boards using bitboards generate the moves (and castling) themselves
+        if board.bitboards is not None:
+            return board.bitboards.get_valid_moves(self)
+
+        enemy = "white" if self.colour == "black" else "black"
+
+        # Take the king off the board while checking so it doesn't block attacks
+        # along the line it is moving away on
+        square = board.get_square_from_pos(self.pos)
+        square.occupying_piece = None
+        output = [
+            move
+            for move in self.get_moves(board)
+            if not board.is_square_attacked(move, enemy)
+        ]
+        square.occupying_piece = self
 
-        if "queenside" in self.can_castle(board):
+        castles = self.can_castle(board)
+        if "queenside" in castles:
             output.append(board.get_square_from_pos((self.x - 2, self.y)))
 
-        if "kingside" in self.can_castle(board):
+        if "kingside" in castles:
             output.append(board.get_square_from_pos((self.x + 2, self.y)))
 
         return output
@@ -1,34 +1,16 @@
 import typing
 
-import pygame
-
-from sharedfiles.piece import Piece
+from sharedfiles.piece import PAWN, Piece
 
 if typing.TYPE_CHECKING:
     from sharedfiles.board import Board
 
 
 class Pawn(Piece):
-    def __init__(self, pos, colour, board):
-        super().__init__(pos, colour)
-
-        # Set up the image and scale it to be the correct size
-        img_path = "sharedfiles/imgs/" + colour[0] + "_pawn.png"
-        self.img = pygame.image.load(img_path)
-
-        scale_factor = 8 / 15
-        self.img = pygame.transform.scale(
-            self.img,
-            (
-                board.tile_width * scale_factor,
-                board.tile_height * scale_factor,
-            ),
-        )
-
-        # Pawn notation is a space
-        self.notation = " "
-
-        self.en_passant_possible = False
+    __slots__ = ()
+    # Pawn notation is a space
+    notation = " "
+    code = PAWN
 
     def __repr__(self):
         """Return a string with the colour and position which is more useful than
@@ -36,87 +18,33 @@ class Pawn(Piece):
         return f"{self.colour} pawn at {self.pos}"
 
     def get_possible_moves(self, board: "Board"):
-        """Gets all the moves the pawn can make currently"""
-        output = []
-        moves: typing.List[typing.Tuple[int, int]] = []
-
-        # move forward
-        if self.colour == "white":
-            # Can move 1 or 2 (only if it hasn't moved before) squares forward
-            moves.append((0, -1))
-            if not self.has_moved:
-                moves.append((0, -2))
-
-        elif self.colour == "black":
-            # Can move 1 or 2 (only if it hasn't moved before) squares forward
-            moves.append((0, 1))
-            if not self.has_moved:
-                moves.append((0, 2))
-
-        for move in moves:
-            new_pos = (self.x, self.y + move[1])
-            if new_pos[1] < board.size and new_pos[1] >= 0:
-                output.append(board.get_square_from_pos(new_pos))
-
-        return output
+        """Gets the squares (as indexes into board.squares) the pawn could move
+        forward to, 1 or 2 (only from its starting row) squares"""
+        return board.tables.pawn_pushes[self.colour_code][self.y * board.size + self.x]
 
     def get_moves(self, board):
         output = []
+        squares = board.squares
 
-        for square in self.get_possible_moves(board):
-            if square.occupying_piece is not None:
+        for i in self.get_possible_moves(board):
+            if squares[i].occupying_piece is not None:
                 break
 
-            output.append(square)
+            output.append(squares[i])
 
         # Handle capturing 1 square diagonally forward
-        if self.colour == "white":
-            if self.x + 1 < 8 and self.y - 1 >= 0:
-                square = board.get_square_from_pos((self.x + 1, self.y - 1))
-                if (
-                    square.occupying_piece is not None
-                    and square.occupying_piece.colour != self.colour
-                ):
-                    output.append(square)
-
-            if self.x - 1 >= 0 and self.y - 1 >= 0:
-                square = board.get_square_from_pos((self.x - 1, self.y - 1))
-                if (
-                    square.occupying_piece is not None
-                    and square.occupying_piece.colour != self.colour
-                ):
-                    output.append(square)
-
-        elif self.colour == "black":
-            if self.x + 1 < 8 and self.y + 1 < 8:
-                square = board.get_square_from_pos((self.x + 1, self.y + 1))
-                if (
-                    square.occupying_piece is not None
-                    and square.occupying_piece.colour != self.colour
-                ):
-                    output.append(square)
-
-            if self.x - 1 >= 0 and self.y + 1 < 8:
-                square = board.get_square_from_pos((self.x - 1, self.y + 1))
-                if (
-                    square.occupying_piece is not None
-                    and square.occupying_piece.colour != self.colour
-                ):
-                    output.append(square)
-
-        # Handle pieces being taken by en passant
-        # A (very badly made) diagram showing how this works is in the base folder
-        # It will also be explained in the README
-
-        opposite_colour = "white" if self.colour == "black" else "black"
-        for pawn in board.get_pawns(opposite_colour, self.y):
-            if self.x in [pawn.x - 1, pawn.x + 1] and pawn.en_passant_possible:
-                # print("Pawn can take via en passant")
-                y = self.y + 1 if pawn.colour == "white" else self.y - 1
-
-                square = board.get_square_from_pos((pawn.x, y))
-                # print(square)
-                output.append(square)
+        index = self.y * board.size + self.x
+        for i in board.tables.pawn_captures[self.colour_code][index]:
+            piece = squares[i].occupying_piece
+            if piece is not None:
+                if piece.colour_code != self.colour_code:
+                    output.append(squares[i])
+
+            # Handle pieces being taken by en passant
+            # A (very badly made) diagram showing how this works is in the base folder
+            # It will also be explained in the README
+            elif i == board.en_passant and self.colour == board.turn:
+                output.append(squares[i])
 
         return output
 
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import functools
+import typing
+
+import pygame
+
+if typing.TYPE_CHECKING:
+    from sharedfiles.board import Board
+    from sharedfiles.square import Square
+
+# The name of each pieces image file, the pieces themselves know nothing about
+# how they are drawn
+PIECE_IMAGES = {
+    " ": "pawn",
+    "R": "rook",
+    "N": "knight",
+    "B": "bishop",
+    "Q": "queen",
+    "K": "king",
+    "W": "kueen",
+}
+
+LIGHT_COLOUR = (220, 208, 194)
+DARK_COLOUR = (53, 53, 53)
+LIGHT_HIGHLIGHT_COLOUR = (100, 249, 83)
+DARK_HIGHLIGHT_COLOUR = (0, 228, 10)
+LIGHT_HINT_COLOUR = (120, 170, 230)
+DARK_HINT_COLOUR = (40, 110, 200)
+
+
+Sprites = typing.Dict[typing.Tuple[str, str], pygame.Surface]
+
+
+@functools.lru_cache(maxsize=None)
+def load_piece_image(colour: str, notation: str) -> pygame.Surface:
+    """Loads a pieces image from its file, only once however many boards and
+    sizes it is drawn at"""
+    return pygame.image.load(
+        f"sharedfiles/imgs/{colour[0]}_{PIECE_IMAGES[notation]}.png"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_piece_sprites(tile_width: int, tile_height: int) -> Sprites:
+    """Every pieces image scaled to fit a square, by (colour, notation)
+
+    They are made once for each size of square and shared by every board that
+    size. Once the window is open they are converted to the screens pixel
+    format, which makes drawing them a lot quicker"""
+    convert = pygame.display.get_surface() is not None
+    sprites: Sprites = {}
+
+    for notation in PIECE_IMAGES:
+        # Pawns are drawn a bit smaller than the other pieces
+        scale_factor = 8 / 15 if notation == " " else 11 / 15
+
+        for colour in ("white", "black"):
+            image = load_piece_image(colour, notation)
+            if convert:
+                image = image.convert_alpha()
+
+            # Scaling keeps the converted pixel format
+            sprites[(colour, notation)] = pygame.transform.scale(
+                image, (tile_width * scale_factor, tile_height * scale_factor)
+            )
+
+    return sprites
+
+
+@functools.lru_cache(maxsize=None)
+def get_board_background(
+    size: int,
+    tile_width: int,
+    tile_height: int,
+    light_colour: typing.Tuple[int, int, int] = LIGHT_COLOUR,
+    dark_colour: typing.Tuple[int, int, int] = DARK_COLOUR,
+) -> pygame.Surface:
+    """The empty board with every square in its normal colour, drawn once for
+    each size of board and square (and colours, so a different theme gets its
+    own) and shared by every board that looks the same
+
+    It shouldn't be drawn on, drawing a board copies from it instead"""
+    background = pygame.Surface((size * tile_width, size * tile_height))
+    if pygame.display.get_surface() is not None:
+        background = background.convert()
+
+    for y in range(size):
+        for x in range(size):
+            # The same pattern as Square.color
+            colour = light_colour if (x + y) % 2 == 0 else dark_colour
+            pygame.draw.rect(
+                background,
+                colour,
+                (x * tile_width, y * tile_height, tile_width, tile_height),
+            )
+
+    return background
+
+
+class BoardRenderer:
+    """Draws a Board onto a pygame surface and plays the sounds for its moves
+
+    The board and pieces are plain python so they can be used without a display,
+    anything to do with pygame goes through here instead
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+
+        # The on screen rectangle for each square, in the same order as board.squares
+        self.rects = [
+            pygame.Rect(
+                square.x * board.tile_width,
+                square.y * board.tile_height,
+                board.tile_width,
+                board.tile_height,
+            )
+            for square in board.squares
+        ]
+
+        # Shared with every other board with the same size squares, so new games
+        # and promotions don't load or scale any images
+        self.images = get_piece_sprites(board.tile_width, board.tile_height)
+
+        # The squares never change colour unless they are highlighted, so they
+        # are copied from this rather than drawn one at a time
+        self.background = get_board_background(
+            board.size, board.tile_width, board.tile_height
+        )
+        self.background_rect = self.background.get_rect()
+
+        # The start and end squares (indexes) of a move to suggest, if any
+        self.hint: typing.Optional[typing.Tuple[int, int]] = None
+
+        # The colour and piece each square was last drawn with, so squares that
+        # look the same as last frame aren't drawn again. None to always draw
+        self.drawn: typing.List[typing.Optional[tuple]] = [None] * len(board.squares)
+
+        board.move_listeners.append(self.play_move_sound)
+
+    def get_highlighted_squares(self) -> typing.List[Square]:
+        """Returns the selected pieces square and any squares it can move to"""
+        board = self.board
+        piece = board.selected_piece
+        if piece is None:
+            return []
+
+        index = piece.y * board.size + piece.x
+        return [board.squares[index], *board.get_legal_moves().get(index, [])]
+
+    def invalidate(self, area: pygame.Rect):
+        """Makes the squares overlapping an area of the screen be drawn again,
+        for when something else has been drawn over them"""
+        for index, rect in enumerate(self.rects):
+            if rect.colliderect(area):
+                self.drawn[index] = None
+
+    def draw(
+        self, display: pygame.Surface, full: bool = False
+    ) -> typing.List[pygame.Rect]:
+        """Draws the squares that have changed since they were last drawn (or all
+        of them if full is True), returning the areas of the screen drawn on"""
+        highlighted = {square.index for square in self.get_highlighted_squares()}
+        hint = self.hint or ()
+        background = self.background
+        drawn = self.drawn
+        dirty = []
+
+        if full:
+            # One copy of the whole board, then only the squares with something
+            # on top need drawing
+            display.blit(background, self.background_rect)
+            dirty.append(self.background_rect)
+
+        for square, rect in zip(self.board.squares, self.rects):
+            # The colour the square is drawn over the background with, if any
+            if square.index in highlighted:
+                colour = (
+                    LIGHT_HIGHLIGHT_COLOUR
+                    if square.color == "light"
+                    else DARK_HIGHLIGHT_COLOUR
+                )
+            elif square.index in hint:
+                colour = (
+                    LIGHT_HINT_COLOUR if square.color == "light" else DARK_HINT_COLOUR
+                )
+            else:
+                colour = None
+
+            piece = square.occupying_piece
+            looks = (colour, None if piece is None else (piece.colour, piece.notation))
+            if not full and drawn[square.index] == looks:
+                continue
+            drawn[square.index] = looks
+
+            if colour is not None:
+                pygame.draw.rect(display, colour, rect)
+            elif not full:
+                # The background is drawn at the top left of the screen like the
+                # squares, so the square's rect is the same part of it
+                display.blit(background, rect, rect)
+
+            if not full:
+                dirty.append(rect)
+
+            # adds the chess piece icons
+            if piece is not None:
+                img = self.images[(piece.colour, piece.notation)]
+                centering_rect = img.get_rect()
+                centering_rect.center = rect.center
+                display.blit(img, centering_rect.topleft)
+
+        return dirty
+
+    def play_move_sound(self, prev_square: Square, square: Square, captured: bool):
+        """Plays the move or capture sound after a piece has moved"""
+        if captured:
+            pygame.mixer.music.load("sharedfiles/sounds/capture.mp3")
+        else:
+            pygame.mixer.music.load("sharedfiles/sounds/move.mp3")
+
+        pygame.mixer.music.play()
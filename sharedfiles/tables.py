@@ -0,0 +1,148 @@
+"""Move tables for each board size
+
+Where a piece could go from a square on an empty board only depends on the size
+of the board, so it is worked out once per size and shared between every board
+of that size rather than being recalculated every time a piece moves.
+
+Squares are referred to by their index in board.squares (y * size + x).
+"""
+
+from __future__ import annotations
+
+import functools
+import typing
+
+from sharedfiles.piece import ALL_DIRECTIONS, KNIGHT_MOVES
+
+# Positions of each direction in ALL_DIRECTIONS
+NORTH, NORTH_EAST, EAST, SOUTH_EAST, SOUTH, SOUTH_WEST, WEST, NORTH_WEST = range(8)
+STRAIGHT = (NORTH, EAST, SOUTH, WEST)
+DIAGONAL = (NORTH_EAST, SOUTH_EAST, SOUTH_WEST, NORTH_WEST)
+
+# Directions where the index goes up with each step, so the nearest piece
+# along them is the lowest set bit of a bitboard rather than the highest
+INCREASING = (EAST, SOUTH_EAST, SOUTH, SOUTH_WEST)
+
+COLUMNS = "abcdefghijklmnop"
+MAX_SIZE = len(COLUMNS)  # There are only letters for 16 columns
+
+Ray = typing.Tuple[int, ...]
+
+
+class Tables:
+    def __init__(self, size: int):
+        self.size = size
+        indexes = range(size * size)
+
+        # The name of each square, like "e4"
+        self.coords = [
+            COLUMNS[index % size] + str(size - index // size) for index in indexes
+        ]
+
+        # The squares going out from each square in each of the 8 directions,
+        # nearest first, in the same order as ALL_DIRECTIONS
+        self.rays: typing.List[typing.Tuple[Ray, ...]] = [
+            tuple(self.make_ray(index, direction) for direction in ALL_DIRECTIONS)
+            for index in indexes
+        ]
+
+        self.knight: typing.List[Ray] = [
+            self.make_jumps(index, KNIGHT_MOVES) for index in indexes
+        ]
+        self.king: typing.List[Ray] = [
+            self.make_jumps(index, ALL_DIRECTIONS) for index in indexes
+        ]
+
+        # Pawns move up the board (towards y = 0) if they are white
+        # These are indexed by the colour code first, white then black
+        self.pawn_captures: typing.List[typing.List[Ray]] = [
+            [self.make_jumps(index, [(1, -1), (-1, -1)]) for index in indexes],
+            [self.make_jumps(index, [(1, 1), (-1, 1)]) for index in indexes],
+        ]
+        self.pawn_pushes: typing.List[typing.List[Ray]] = [
+            [self.make_pushes(index, -1) for index in indexes],
+            [self.make_pushes(index, 1) for index in indexes],
+        ]
+
+        # The same tables laid out how Piece.get_possible_moves returns them,
+        # a list of directions each with the squares along it
+        self.straight_moves = [
+            tuple(rays[direction] for direction in STRAIGHT) for rays in self.rays
+        ]
+        self.diagonal_moves = [
+            tuple(rays[direction] for direction in DIAGONAL) for rays in self.rays
+        ]
+        self.knight_moves = [tuple((i,) for i in jumps) for jumps in self.knight]
+        self.king_moves = [tuple((i,) for i in jumps) for jumps in self.king]
+        self.kueen_moves = [
+            rays + knight for rays, knight in zip(self.rays, self.knight_moves)
+        ]
+
+        # Bitboard versions, with bit i set for each square i in the table
+        self.ray_bits = [tuple(to_bitboard(ray) for ray in rays) for rays in self.rays]
+        self.knight_bits = [to_bitboard(jumps) for jumps in self.knight]
+        self.king_bits = [to_bitboard(jumps) for jumps in self.king]
+        self.pawn_bits = [
+            [to_bitboard(jumps) for jumps in captures]
+            for captures in self.pawn_captures
+        ]
+        # The square one step and two steps in front of each pawn, separately
+        self.pawn_step_bits = [
+            [to_bitboard(pushes[:1]) for pushes in colour_pushes]
+            for colour_pushes in self.pawn_pushes
+        ]
+        self.pawn_double_step_bits = [
+            [to_bitboard(pushes[1:]) for pushes in colour_pushes]
+            for colour_pushes in self.pawn_pushes
+        ]
+        # Every square in each row and each column
+        self.row_bits = [
+            to_bitboard(range(y * size, (y + 1) * size)) for y in range(size)
+        ]
+        self.column_bits = [
+            to_bitboard(range(x, size * size, size)) for x in range(size)
+        ]
+
+    def make_ray(self, index: int, direction: typing.Tuple[int, int]) -> Ray:
+        x, y = index % self.size, index // self.size
+        dx, dy = direction
+
+        output = []
+        x, y = x + dx, y + dy
+        while 0 <= x < self.size and 0 <= y < self.size:
+            output.append(y * self.size + x)
+            x, y = x + dx, y + dy
+
+        return tuple(output)
+
+    def make_jumps(
+        self, index: int, offsets: typing.List[typing.Tuple[int, int]]
+    ) -> Ray:
+        x, y = index % self.size, index // self.size
+
+        return tuple(
+            (y + dy) * self.size + x + dx
+            for dx, dy in offsets
+            if 0 <= x + dx < self.size and 0 <= y + dy < self.size
+        )
+
+    def make_pushes(self, index: int, dy: int) -> Ray:
+        """One square forward, or two from the pawns starting row"""
+        y = index // self.size
+        start_row = self.size - 2 if dy == -1 else 1
+
+        if not 0 <= y + dy < self.size:
+            return ()
+        if y == start_row:
+            return (index + dy * self.size, index + 2 * dy * self.size)
+        return (index + dy * self.size,)
+
+
+def to_bitboard(indexes: typing.Iterable[int]) -> int:
+    return sum(1 << i for i in indexes)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tables(size: int) -> Tables:
+    """Returns the tables for a board size, making them the first time"""
+    return Tables(size)
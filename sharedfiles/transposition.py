@@ -0,0 +1,180 @@
+"""The transposition table, remembering positions the engine has already searched
+
+The same position can often be reached by playing moves in a different order,
+so the result of searching it is stored under its Zobrist hash and reused the
+next time it comes up.
+
+The table has a fixed size set in megabytes, so a long game or analysis can't
+use up all the memory. It is split into buckets of two slots:
+- the first keeps whichever position was searched deepest, as those took the
+  longest to work out
+- the second is always overwritten, so recent positions are still kept
+
+Each slot is two 64 bit numbers in preallocated arrays, the full hash to check
+it is the right position and everything else packed into one number.
+"""
+
+from __future__ import annotations
+
+import array
+import typing
+
+from sharedfiles.tables import MAX_SIZE
+
+# What the score stored for a position means, as the search may have stopped
+# before finding the exact score
+EXACT = 0  # The score is exact
+LOWER = 1  # The score is at least this, a move was found that was too good
+UPPER = 2  # The score is at most this, none of the moves were good enough
+
+# Bytes used by one slot, a hash and its packed data
+SLOT_BYTES = 16
+
+# How the data for a slot is packed into one number, from the lowest bits up
+SCORE_BITS = 22
+DEPTH_BITS = 7
+FLAG_BITS = 2
+# Enough for the start and end square indexes on the biggest board, plus one so
+# 0 can mean no move
+SQUARE_BITS = (MAX_SIZE * MAX_SIZE - 1).bit_length()
+MOVE_BITS = SQUARE_BITS * 2 + 1
+AGE_BITS = 8
+
+# Scores can be negative so they are stored with this added
+SCORE_OFFSET = 1 << (SCORE_BITS - 1)
+
+DEPTH_SHIFT = SCORE_BITS
+FLAG_SHIFT = DEPTH_SHIFT + DEPTH_BITS
+MOVE_SHIFT = FLAG_SHIFT + FLAG_BITS
+AGE_SHIFT = MOVE_SHIFT + MOVE_BITS
+
+SCORE_MASK = (1 << SCORE_BITS) - 1
+DEPTH_MASK = (1 << DEPTH_BITS) - 1
+FLAG_MASK = (1 << FLAG_BITS) - 1
+MOVE_MASK = (1 << MOVE_BITS) - 1
+AGE_MASK = (1 << AGE_BITS) - 1
+SQUARE_MASK = (1 << SQUARE_BITS) - 1
+
+if AGE_SHIFT + AGE_BITS > 64:
+    raise ValueError("A slot's data doesn't fit in 64 bits")
+
+Move = typing.Tuple[int, int]  # (start index, end index) in board.squares
+
+
+class Entry(typing.NamedTuple):
+    depth: int
+    score: int
+    flag: int  # EXACT, LOWER or UPPER
+    move: typing.Optional[Move]  # The best move found, if there was one
+
+
+class TranspositionTable:
+    def __init__(self, megabytes: float = 16):
+        # Round down to a power of two buckets so a hash can be turned into a
+        # bucket with a mask instead of a (slower) modulo
+        buckets = max(1, int(megabytes * 1024 * 1024) // (SLOT_BYTES * 2))
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.mask = buckets - 1
+        self.slots = buckets * 2
+
+        # keys[i] is the hash of the position in slot i, 0 if it is empty
+        self.keys = array.array("Q", bytes(8 * self.slots))
+        self.data = array.array("Q", bytes(8 * self.slots))
+
+        # Goes up with each search, so entries left from earlier searches can be
+        # replaced even if they were searched deeper
+        self.age = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.filled = 0  # Slots that aren't empty
+
+    @property
+    def megabytes(self) -> float:
+        return self.slots * SLOT_BYTES / (1024 * 1024)
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that found the position"""
+        return self.hits / self.probes if self.probes else 0.0
+
+    @property
+    def occupancy(self) -> float:
+        """The fraction of slots in use"""
+        return self.filled / self.slots
+
+    def new_search(self):
+        """Marks everything stored so far as old, to be called before each
+        search"""
+        self.age = (self.age + 1) & AGE_MASK
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def clear(self):
+        """Empties the table, replacing the arrays with new empty ones the same
+        size"""
+        self.keys = array.array("Q", bytes(8 * self.slots))
+        self.data = array.array("Q", bytes(8 * self.slots))
+        self.filled = 0
+
+    def probe(self, key: int) -> typing.Optional[Entry]:
+        """Looks up a position by its hash"""
+        self.probes += 1
+        slot = (key & self.mask) << 1
+        keys = self.keys
+
+        if keys[slot] != key:
+            slot += 1
+            if keys[slot] != key:
+                return None
+
+        self.hits += 1
+        data = self.data[slot]
+        move = data >> MOVE_SHIFT & MOVE_MASK
+        return Entry(
+            data >> DEPTH_SHIFT & DEPTH_MASK,
+            (data & SCORE_MASK) - SCORE_OFFSET,
+            data >> FLAG_SHIFT & FLAG_MASK,
+            # 0 means no move, otherwise it is the start and end indexes + 1
+            ((move - 1) >> SQUARE_BITS, (move - 1) & SQUARE_MASK) if move else None,
+        )
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: int,
+        flag: int,
+        move: typing.Optional[Move] = None,
+    ):
+        """Saves the result of searching a position"""
+        self.stores += 1
+        slot = (key & self.mask) << 1
+        keys = self.keys
+        data = self.data
+
+        # The deepest slot is only replaced by a search at least as deep, or if
+        # it is left over from an earlier search or is the same position
+        old_key = keys[slot]
+        if old_key != key and old_key:
+            old = data[slot]
+            if (
+                old >> AGE_SHIFT & AGE_MASK == self.age
+                and old >> DEPTH_SHIFT & DEPTH_MASK > depth
+            ):
+                slot += 1
+                old_key = keys[slot]
+
+        if not old_key:
+            self.filled += 1
+
+        keys[slot] = key
+        data[slot] = (
+            score + SCORE_OFFSET
+            | min(depth, DEPTH_MASK) << DEPTH_SHIFT
+            | flag << FLAG_SHIFT
+            | ((move[0] << SQUARE_BITS | move[1]) + 1 if move else 0) << MOVE_SHIFT
+            | self.age << AGE_SHIFT
+        )
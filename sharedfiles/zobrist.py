@@ -0,0 +1,58 @@
+"""Zobrist hashing
+
+Every piece on every square, the side to move, each set of castling rights and
+each en passant column gets a random 64 bit number. A positions hash is all the
+numbers for it XORed together, so a move only has to XOR out what it changed
+and XOR in what it added rather than looking at the whole board again.
+
+The numbers come from a fixed seed so the same position always has the same
+hash, even between runs of the game.
+"""
+
+from __future__ import annotations
+
+import functools
+import random
+import typing
+
+from sharedfiles.piece import COLOURS, NOTATIONS
+
+SEED = 20240229
+
+
+class ZobristKeys:
+    def __init__(self, size: int):
+        self.size = size
+        rng = random.Random(SEED + size)  # noqa: S311
+
+        def key() -> int:
+            return rng.getrandbits(64)
+
+        # pieces[colour_code][code][index] for every piece on every square
+        self.pieces: typing.List[typing.List[typing.List[int]]] = [
+            [[key() for _ in range(size * size)] for _ in NOTATIONS] for _ in COLOURS
+        ]
+
+        # XORed in when it is blacks turn
+        self.black_to_move = key()
+
+        # One key per castling right, combined for every value of
+        # Board.castling_rights so a change of rights is a single XOR
+        rights = [key() for _ in range(4)]
+        self.castling = [
+            functools.reduce(
+                lambda total, bit: total ^ rights[bit],
+                (bit for bit in range(4) if mask >> bit & 1),
+                0,
+            )
+            for mask in range(16)
+        ]
+
+        # Only the column matters, the row always follows from whose turn it is
+        self.en_passant = [key() for _ in range(size)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_zobrist_keys(size: int) -> ZobristKeys:
+    """Returns the keys for a board size, making them the first time"""
+    return ZobristKeys(size)
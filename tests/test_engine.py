@@ -0,0 +1,36 @@
+"""Checks the engine sees repetitions of positions from before the search"""
+
+from __future__ import annotations
+
+from sharedfiles.board import Board
+from sharedfiles.engine import Engine
+
+
+def make_moves(board: Board, moves: str):
+    coords = board.tables.coords
+    for move in moves.split():
+        start, end = coords.index(move[:2]), coords.index(move[2:])
+        board.make_move(board.squares[start], board.squares[end])
+
+
+def test_repetition_from_the_game():
+    board = Board(800, 800)
+    make_moves(board, "g1f3 g8f6 f3g1 f6g8")
+
+    # The search works on a copy or a restored snapshot, neither of which can
+    # take back the moves played in the game
+    restored = Board(800, 800)
+    restored.restore(board.snapshot())
+    for copy in (board.clone(), restored):
+        make_moves(copy, "g1f3")
+        assert Engine().is_repetition(copy)
+
+
+def test_history_stops_at_a_pawn_move():
+    board = Board(800, 800)
+    make_moves(board, "g1f3 g8f6 f3g1 f6g8 e2e4")
+    assert board.clone().history == []
+
+    # Only the positions since the pawn move are kept
+    make_moves(board, "g8f6 g1f3")
+    assert board.clone().history == [undo.hash for undo in board.undo_stack[-2:]]
@@ -0,0 +1,38 @@
+"""Checks load_fen turns down FENs that can't be right, without changing the
+board"""
+
+from __future__ import annotations
+
+import pytest
+
+from sharedfiles.board import Board
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        # Castling letters other than KQkq, or the same one twice
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkqZ - 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KKq - 0 1",
+        # The move number starts at 1
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0",
+        # Pawns on the first or last row
+        "rnbqkbnP/pppppppp/8/8/8/8/PPPPPPP1/RNBQKBNR w - - 0 1",
+        "rnbqkbnr/ppppppp1/8/8/8/8/PPPPPPPP/RNBQKBNp w - - 0 1",
+    ],
+)
+def test_load_fen_rejects(fen: str):
+    board = Board(800, 800)
+    with pytest.raises(ValueError):
+        board.load_fen(fen)
+
+    # Nothing is changed if the FEN is wrong
+    assert board.get_fen() == START
+
+
+def test_load_fen_round_trip():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w Kq - 3 12"
+    board = Board(800, 800, fen=fen)
+    assert board.get_fen() == fen
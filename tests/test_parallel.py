@@ -0,0 +1,41 @@
+"""Checks the parallel search finds the same move as a single process, and is
+faster when there is more than one core to run it on"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from sharedfiles.engine import Engine
+from sharedfiles.parallel import ParallelEngine
+from sharedfiles.perft import POSITIONS, setup_position
+
+KIWIPETE = next(position for position in POSITIONS if position.name == "kiwipete")
+
+
+def test_parallel_matches_single():
+    board = setup_position(KIWIPETE)
+    single = Engine().search(board, max_depth=3)
+
+    engine = ParallelEngine(2)
+    try:
+        parallel = engine.search(board, 3)
+    finally:
+        engine.close()
+
+    assert (parallel.move, parallel.score) == (single.move, single.score)
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="needs more than one core")
+def test_parallel_is_faster():
+    board = setup_position(KIWIPETE)
+    single = Engine().search(board, max_depth=4)
+
+    engine = ParallelEngine()
+    try:
+        parallel = engine.search(board, 4)
+    finally:
+        engine.close()
+
+    assert parallel.seconds < single.seconds
@@ -9,12 +9,15 @@ class User:
         playing_as: str | None = None,
         rating: int | None = None,
         guest: bool = False,
+        computer: bool = False,
     ) -> None:
         self.user_id = user_id
         self.username = username or "Guest"
         self.playing_as = playing_as
         self.rating = rating
         self.guest = guest
+        # Moves are made by the engine rather than by clicking
+        self.computer = computer
 
     def __repr__(self):
         return f"{self.user_id} ({self.username})"